@@ -31,6 +31,8 @@ from routes.users import users_bp
 from routes.attendance import attendance_bp
 from routes.recognition import recognition_bp
 from routes.reports import reports_bp
+from database import db
+from services.recognition_log_writer import get_log_writer
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -41,7 +43,12 @@ app.register_blueprint(reports_bp, url_prefix='/api/reports')
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'db_pool': db.get_pool_stats(),
+        'recognition_log': get_log_writer().get_stats()
+    })
 
 @app.errorhandler(404)
 def not_found(error):
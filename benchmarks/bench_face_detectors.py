@@ -0,0 +1,93 @@
+"""
+Face Detector Benchmark
+Compares per-frame CPU detection latency and hit rate (share of frames with at
+least one detected face) for the available detector backends.
+
+Usage:
+    python benchmarks/bench_face_detectors.py --video entrance.mp4
+    python benchmarks/bench_face_detectors.py --images samples/ --backends hog dnn --width 640 --height 480
+"""
+
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.face_detector import create_face_detector, DnnFaceDetector
+
+
+def load_frames(args):
+    """Load benchmark frames as RGB arrays resized to the target resolution"""
+    frames = []
+
+    if args.video:
+        capture = cv2.VideoCapture(args.video)
+        while len(frames) < args.limit:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(frame)
+        capture.release()
+    else:
+        for filename in sorted(os.listdir(args.images)):
+            if len(frames) >= args.limit:
+                break
+            frame = cv2.imread(os.path.join(args.images, filename))
+            if frame is not None:
+                frames.append(frame)
+
+    return [cv2.cvtColor(cv2.resize(frame, (args.width, args.height)), cv2.COLOR_BGR2RGB)
+            for frame in frames]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Face detector benchmark')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--video', type=str, help='Video file to read frames from')
+    source.add_argument('--images', type=str, help='Directory of images')
+    parser.add_argument('--backends', nargs='+', default=['hog', 'dnn'])
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--limit', type=int, default=300, help='Maximum number of frames')
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    if not frames:
+        print("No frames loaded")
+        return
+
+    print(f"{len(frames)} frames at {args.width}x{args.height}")
+    print(f"{'backend':<8} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'fps':>7} {'hit rate':>9} {'faces':>6}")
+    print("-" * 60)
+
+    for backend in args.backends:
+        detector = create_face_detector(backend)
+        if backend == 'dnn' and not isinstance(detector, DnnFaceDetector):
+            print(f"{backend:<8} skipped (weights not available)")
+            continue
+
+        # Warm up (model load, first-call allocations)
+        detector.detect(frames[0])
+
+        latencies = []
+        hits = 0
+        faces = 0
+        for frame in frames:
+            start = time.perf_counter()
+            locations = detector.detect(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += 1 if locations else 0
+            faces += len(locations)
+
+        latencies = np.array(latencies)
+        print(f"{backend:<8} {latencies.mean():>8.1f} {np.percentile(latencies, 50):>8.1f} "
+              f"{np.percentile(latencies, 95):>8.1f} {1000 / latencies.mean():>7.1f} "
+              f"{hits / len(frames):>9.2f} {faces:>6}")
+
+
+if __name__ == '__main__':
+    main()
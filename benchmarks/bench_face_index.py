@@ -0,0 +1,105 @@
+"""
+Gallery Index Benchmark
+Compares approximate and per-user centroid indexes against an exact scan on synthetic 128-d galleries.
+Reports build time, recall@1 (agreement with the exact nearest neighbour)
+and mean query latency.
+
+Usage:
+    python benchmarks/bench_face_index.py
+    python benchmarks/bench_face_index.py --sizes 10000 100000 1000000 --nprobe 4 8 16 --shortlist 5 10
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.face_gallery import FaceGallery
+from services.face_index import ExactIndex, IVFIndex, CentroidIndex
+
+
+def make_gallery(size, encodings_per_user=5, dim=128, seed=0):
+    """
+    Synthetic gallery shaped like enrolled faces: one random identity vector per
+    user plus per-photo noise, scaled so same-person distances sit near 0.3-0.4
+    """
+    rng = np.random.default_rng(seed)
+    users = max(1, size // encodings_per_user)
+    identities = rng.normal(0, 0.09, (users, dim)).astype(np.float32)
+    labels = np.arange(size) % users
+    encodings = identities[labels] + rng.normal(0, 0.025, (size, dim)).astype(np.float32)
+
+    gallery = FaceGallery(dim=dim, capacity=size)
+    order = np.argsort(labels, kind='stable')
+    bounds = np.searchsorted(labels[order], np.arange(users + 1))
+    for user_id in range(users):
+        rows = order[bounds[user_id]:bounds[user_id + 1]]
+        gallery.add(user_id, f"User {user_id}", f"EMP{user_id:07d}", encodings[rows])
+    return gallery, identities
+
+
+def make_probes(identities, count, seed=1):
+    """Fresh captures of randomly chosen enrolled users"""
+    rng = np.random.default_rng(seed)
+    chosen = rng.integers(0, identities.shape[0], count)
+    noise = rng.normal(0, 0.025, (count, identities.shape[1])).astype(np.float32)
+    return identities[chosen] + noise
+
+
+def time_queries(index, probes, **kwargs):
+    """Run probes one at a time (as /identify does) and return (indices, mean ms)"""
+    results = []
+    start = time.perf_counter()
+    for probe in probes:
+        _, indices = index.search(probe, k=1, **kwargs)
+        results.append(indices[0, 0])
+    elapsed = time.perf_counter() - start
+    return np.array(results), elapsed / len(probes) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gallery index benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--nlist', type=int, default=0, help='IVF clusters (0 = sqrt(n))')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--shortlist', type=int, nargs='+', default=[1, 5, 10])
+    args = parser.parse_args()
+
+    print(f"{'size':>9} {'index':<14} {'build s':>8} {'recall@1':>9} {'query ms':>9}")
+    print("-" * 53)
+
+    for size in args.sizes:
+        gallery, identities = make_gallery(size)
+        probes = make_probes(identities, args.queries)
+
+        exact = ExactIndex().build(gallery)
+        truth, exact_ms = time_queries(exact, probes)
+        print(f"{size:>9} {'exact':<14} {0.0:>8.2f} {1.0:>9.3f} {exact_ms:>9.3f}")
+
+        start = time.perf_counter()
+        ivf = IVFIndex(nlist=args.nlist, min_size=0).build(gallery)
+        build_s = time.perf_counter() - start
+
+        for nprobe in args.nprobe:
+            found, ivf_ms = time_queries(ivf, probes, nprobe=nprobe)
+            recall = float(np.mean(found == truth))
+            label = f"ivf/{nprobe}"
+            print(f"{size:>9} {label:<14} {build_s:>8.2f} {recall:>9.3f} {ivf_ms:>9.3f}")
+
+        start = time.perf_counter()
+        centroid = CentroidIndex().build(gallery)
+        build_s = time.perf_counter() - start
+
+        for shortlist in args.shortlist:
+            found, centroid_ms = time_queries(centroid, probes, nprobe=shortlist)
+            recall = float(np.mean(found == truth))
+            label = f"centroid/{shortlist}"
+            print(f"{size:>9} {label:<14} {build_s:>8.2f} {recall:>9.3f} {centroid_ms:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Recognition Worker Pool Benchmark
+Measures decode + detect + encode throughput (requests/sec) and latency of the
+recognition worker pool at several pool sizes, with enough concurrent client
+threads to keep every worker busy (as threaded Flask workers would).
+
+Usage:
+    python benchmarks/bench_recognition_pool.py --images samples/
+    python benchmarks/bench_recognition_pool.py --images samples/ --workers 1 2 4 8 --requests 400
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.recognition_pool import RecognitionPool
+
+
+def load_images(directory):
+    """Read encoded image files (JPEG/PNG bytes) from a directory"""
+    images = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+            with open(os.path.join(directory, filename), 'rb') as f:
+                images.append(f.read())
+    return images
+
+
+def run(pool, images, requests, clients):
+    """Issue `requests` encode calls from `clients` threads; return (rps, latencies ms)"""
+    latencies = []
+
+    def one_request(i):
+        start = time.perf_counter()
+        pool.encode_image(images[i % len(images)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return requests / elapsed, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recognition worker pool benchmark')
+    parser.add_argument('--images', type=str, required=True, help='Directory of face photos')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        print("No images found")
+        return
+
+    print(f"{len(images)} images, {args.requests} requests per run, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'req/s':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    print("-" * 44)
+
+    baseline = None
+    for workers in args.workers:
+        pool = RecognitionPool(workers=workers, max_queue=args.requests, task_timeout=120)
+        pool.warm_up()
+
+        rps, latencies = run(pool, images, args.requests, clients=workers * 2)
+        pool.shutdown()
+
+        baseline = baseline or rps
+        print(f"{workers:>7} {rps:>8.1f} {rps / baseline:>7.2f}x "
+              f"{np.percentile(latencies, 50):>8.1f} {np.percentile(latencies, 95):>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -20,17 +20,75 @@ class CameraConfig:
     CAMERA_WIDTH = int(os.getenv('CAMERA_WIDTH', '640'))
     CAMERA_HEIGHT = int(os.getenv('CAMERA_HEIGHT', '480'))
 
+    # Low-latency capture: keep a single frame buffered so reads return the
+    # newest frame instead of a backlog of stale ones
+    LOW_LATENCY_CAPTURE = os.getenv('LOW_LATENCY_CAPTURE', 'true').lower() == 'true'
+
+    # Reconnect dropped RTSP/HTTP streams, backing off from the initial to the
+    # maximum delay (seconds)
+    RECONNECT_INITIAL_DELAY = float(os.getenv('RECONNECT_INITIAL_DELAY', '1'))
+    RECONNECT_MAX_DELAY = float(os.getenv('RECONNECT_MAX_DELAY', '30'))
+
+    # Frames per second decoded for the preview window (0 = every frame);
+    # other frames not sampled for recognition are grabbed without decoding
+    DISPLAY_MAX_FPS = float(os.getenv('DISPLAY_MAX_FPS', '15'))
+
     # Frame processing settings
     PROCESS_EVERY_N_FRAMES = int(os.getenv('PROCESS_EVERY_N_FRAMES', '5'))
     RESIZE_SCALE = float(os.getenv('RESIZE_SCALE', '0.5'))
 
+    # Adaptive sampling: PROCESS_EVERY_N_FRAMES and RESIZE_SCALE are starting
+    # points, adjusted within these bounds to keep the 90th-percentile
+    # capture-to-result latency under TARGET_LATENCY_MS (RESIZE_SCALE is also
+    # the upper bound of the scale)
+    ADAPTIVE_SAMPLING = os.getenv('ADAPTIVE_SAMPLING', 'true').lower() == 'true'
+    TARGET_LATENCY_MS = float(os.getenv('TARGET_LATENCY_MS', '300'))
+    MIN_FRAME_INTERVAL = int(os.getenv('MIN_FRAME_INTERVAL', '1'))
+    MAX_FRAME_INTERVAL = int(os.getenv('MAX_FRAME_INTERVAL', '15'))
+    MIN_RESIZE_SCALE = float(os.getenv('MIN_RESIZE_SCALE', '0.25'))
+
+    # Motion gate in front of face detection ('diff' = frame differencing,
+    # 'mog2' = OpenCV background subtraction, 'off' = detect on every processed frame)
+    MOTION_GATE = os.getenv('MOTION_GATE', 'diff')
+
+    # Region watched for motion as "x,y,w,h" fractions of the frame (empty = whole frame)
+    MOTION_ROI = os.getenv('MOTION_ROI', '')
+
+    # Pixel intensity change counted as motion, fraction of the region that must
+    # change, and processed frames detection keeps running after motion stops
+    MOTION_THRESHOLD = int(os.getenv('MOTION_THRESHOLD', '25'))
+    MOTION_MIN_AREA = float(os.getenv('MOTION_MIN_AREA', '0.01'))
+    MOTION_HOLD_FRAMES = int(os.getenv('MOTION_HOLD_FRAMES', '10'))
+
+    # Face tracking: minimum box overlap to continue a track, processed frames a
+    # track survives unseen, and frames between re-identifications of known /
+    # unrecognized faces
+    TRACK_IOU_THRESHOLD = float(os.getenv('TRACK_IOU_THRESHOLD', '0.3'))
+    TRACK_MAX_MISSED = int(os.getenv('TRACK_MAX_MISSED', '5'))
+    TRACK_REVERIFY_FRAMES = int(os.getenv('TRACK_REVERIFY_FRAMES', '30'))
+    TRACK_RETRY_UNKNOWN_FRAMES = int(os.getenv('TRACK_RETRY_UNKNOWN_FRAMES', '5'))
+
+    # Pipeline: inference workers (threads, each with one recognition process
+    # for detection and encoding), queue bounds (oldest entries are dropped
+    # when full) and seconds between stats printouts (0 = only at exit)
+    INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', '2'))
+    ANNOTATION_QUEUE_SIZE = int(os.getenv('ANNOTATION_QUEUE_SIZE', '4'))
+    ATTENDANCE_QUEUE_SIZE = int(os.getenv('ATTENDANCE_QUEUE_SIZE', '256'))
+    PIPELINE_STATS_INTERVAL = float(os.getenv('PIPELINE_STATS_INTERVAL', '60'))
+
     # Recognition settings
     COOLDOWN_MINUTES = int(os.getenv('COOLDOWN_MINUTES', '5'))
     CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', '0.6'))
 
-    # Face detection model ('hog' is faster, 'cnn' is more accurate but requires GPU)
+    # Face detection model ('hog' is faster, 'cnn' is more accurate but requires GPU,
+    # 'dnn' is the OpenCV ResNet-10 SSD detector, fast on CPU)
     FACE_DETECTION_MODEL = os.getenv('FACE_DETECTION_MODEL', 'hog')
 
+    # OpenCV DNN detector files and minimum detection confidence
+    DNN_PROTOTXT_PATH = os.getenv('DNN_PROTOTXT_PATH', 'models/dnn/deploy.prototxt')
+    DNN_WEIGHTS_PATH = os.getenv('DNN_WEIGHTS_PATH', 'models/dnn/res10_300x300_ssd_iter_140000.caffemodel')
+    DNN_CONFIDENCE_THRESHOLD = float(os.getenv('DNN_CONFIDENCE_THRESHOLD', '0.5'))
+
     @staticmethod
     def get_camera_source():
         """Get the active camera source"""
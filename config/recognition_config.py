@@ -0,0 +1,100 @@
+"""
+Recognition Configuration
+Gallery index and matching settings for FaceRecognitionService
+"""
+
+import os
+
+class RecognitionConfig:
+    """Face recognition service settings"""
+
+    # Gallery search index ('exact' = brute-force scan, 'ivf' = inverted file ANN,
+    # 'centroid' = per-user centroid shortlist then exact re-rank)
+    FACE_INDEX = os.getenv('FACE_INDEX', 'exact')
+
+    # IVF index: number of coarse clusters (0 = auto, about sqrt(gallery size))
+    IVF_NLIST = int(os.getenv('IVF_NLIST', '0'))
+
+    # IVF index: clusters scanned per probe (higher = better recall, slower)
+    IVF_NPROBE = int(os.getenv('IVF_NPROBE', '8'))
+
+    # IVF index: galleries smaller than this use an exact scan instead
+    IVF_MIN_SIZE = int(os.getenv('IVF_MIN_SIZE', '20000'))
+
+    # Centroid index: users shortlisted by centroid distance before exact re-ranking
+    CENTROID_SHORTLIST = int(os.getenv('CENTROID_SHORTLIST', '10'))
+
+    # Longest image side used for face detection (0 = detect at full resolution)
+    # Boxes are mapped back and encodings are computed on the full-resolution image
+    DETECTION_MAX_SIDE = int(os.getenv('DETECTION_MAX_SIDE', '640'))
+
+    # Web server worker processes on this host (gunicorn also reads WEB_CONCURRENCY
+    # as its default worker count)
+    WEB_WORKERS = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+
+    # Recognition worker processes for decoding, detection and encoding, per web
+    # worker: every web worker starts its own pool, so the host runs
+    # WEB_WORKERS * RECOGNITION_WORKERS of them (default: the CPUs divided
+    # among the web workers, 0 = run inline in the request thread)
+    RECOGNITION_WORKERS = int(os.getenv('RECOGNITION_WORKERS', str(max(1, (os.cpu_count() or 1) // WEB_WORKERS))))
+
+    # Tasks that may wait for a free worker before submitters are rejected
+    RECOGNITION_QUEUE_SIZE = int(os.getenv('RECOGNITION_QUEUE_SIZE', '32'))
+
+    # Seconds a request waits for a queue slot and again for its result
+    RECOGNITION_TASK_TIMEOUT = float(os.getenv('RECOGNITION_TASK_TIMEOUT', '10'))
+
+    # Maximum number of images accepted by /api/recognition/identify/batch
+    MAX_BATCH_IMAGES = int(os.getenv('MAX_BATCH_IMAGES', '64'))
+
+    # Gallery storage ('local' = private copy per process,
+    # 'shared' = one read-only copy in shared memory mapped by every worker;
+    # with FACE_INDEX=ivf/centroid the clusters are published with it, so only
+    # the publishing worker clusters the gallery)
+    GALLERY_BACKEND = os.getenv('GALLERY_BACKEND', 'local')
+
+    # Name of the shared memory segment used by the 'shared' backend
+    GALLERY_SHM_NAME = os.getenv('GALLERY_SHM_NAME', 'eyedentify_gallery')
+
+    # Directory of the memory-mapped gallery snapshot and its change journal
+    GALLERY_SNAPSHOT_PATH = os.getenv('GALLERY_SNAPSHOT_PATH', 'models/gallery')
+
+    # Recompute the snapshot checksum on load (reads the whole file at startup)
+    GALLERY_VERIFY_SNAPSHOT = os.getenv('GALLERY_VERIFY_SNAPSHOT', 'false').lower() == 'true'
+
+    # Incremental changes kept in the snapshot's journal before the gallery is
+    # rewritten as a new snapshot (records, bytes)
+    GALLERY_JOURNAL_MAX_RECORDS = int(os.getenv('GALLERY_JOURNAL_MAX_RECORDS', '100'))
+    GALLERY_JOURNAL_MAX_BYTES = int(os.getenv('GALLERY_JOURNAL_MAX_BYTES', str(4 * 1024 * 1024)))
+
+    # Stamp file holding the gallery generation, bumped whenever the gallery changes
+    GALLERY_GENERATION_PATH = os.getenv('GALLERY_GENERATION_PATH', 'models/gallery.generation')
+
+    # Minimum seconds between generation checks per process (0 = every request)
+    GALLERY_CHECK_INTERVAL = float(os.getenv('GALLERY_CHECK_INTERVAL', '1'))
+
+    # Write-behind recognition log: buffered entries, flush period (ms), entries
+    # that trigger an early flush, and what to do when the buffer is full
+    # ('drop_oldest', 'drop_newest' or 'sync' = write in the request thread)
+    RECOGNITION_LOG_BUFFER = int(os.getenv('RECOGNITION_LOG_BUFFER', '10000'))
+    RECOGNITION_LOG_FLUSH_MS = float(os.getenv('RECOGNITION_LOG_FLUSH_MS', '500'))
+    RECOGNITION_LOG_FLUSH_ROWS = int(os.getenv('RECOGNITION_LOG_FLUSH_ROWS', '500'))
+    RECOGNITION_LOG_OVERFLOW = os.getenv('RECOGNITION_LOG_OVERFLOW', 'drop_oldest')
+
+    @staticmethod
+    def get_index_params():
+        """Get keyword arguments for create_face_index()"""
+        return {
+            'kind': RecognitionConfig.FACE_INDEX,
+            'nlist': RecognitionConfig.IVF_NLIST,
+            'nprobe': RecognitionConfig.IVF_NPROBE,
+            'min_size': RecognitionConfig.IVF_MIN_SIZE,
+            'shortlist': RecognitionConfig.CENTROID_SHORTLIST
+        }
+
+
+# Example usage:
+if __name__ == '__main__':
+    print("Recognition Configuration:")
+    for key, value in RecognitionConfig.get_index_params().items():
+        print(f"  {key}: {value}")
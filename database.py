@@ -1,8 +1,394 @@
+import io
+import collections
+import struct
+import threading
+import time
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor, execute_values as _execute_values
 from contextlib import contextmanager
 import os
 
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the checkout timeout"""
+
+
+class PoolClosed(Exception):
+    """Raised when a connection is requested from a closed pool"""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of PostgreSQL connections
+    Opens `min_size` connections on first use and up to `max_size` under load;
+    callers wait up to `timeout` seconds for a free connection. Connections
+    idle for longer than `check_idle` seconds are pinged before reuse, and
+    connections older than `max_lifetime` seconds are closed and replaced.
+    After a fork the child starts with an empty pool, so pre-forking servers
+    never share a connection between processes.
+    """
+
+    def __init__(self, config, min_size=1, max_size=10, timeout=10.0, max_lifetime=1800, check_idle=30):
+        self.config = config
+        self.max_size = max(max_size, 1)
+        self.min_size = min(max(min_size, 0), self.max_size)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle = check_idle
+        self._condition = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        """Start with an empty pool in the current process"""
+        self._pid = os.getpid()
+        self._idle = collections.deque()  # (connection, created_at, last_used)
+        self._created = {}  # id(connection) -> created_at, for checked-out connections
+        self._size = 0
+        self._filled = False
+        self._closed = False
+        self._waiting = 0
+        self._stats = {
+            'checkouts': 0, 'waits': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0, 'timeouts': 0,
+            'opened': 0, 'closed': 0, 'recycled': 0, 'failed_checks': 0
+        }
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            # Connections inherited from the parent belong to its sessions: keep
+            # them referenced but never use or close them here (closing would
+            # terminate the parent's session)
+            self._inherited = list(self._idle)
+            self._condition = threading.Condition()
+            self._reset()
+
+    def _open(self):
+        conn = psycopg2.connect(**self.config)
+        with self._condition:
+            self._stats['opened'] += 1
+        return conn, time.monotonic()
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._condition:
+            self._size -= 1
+            self._stats['closed'] += 1
+            self._condition.notify()
+
+    def _fill(self):
+        """
+        Open the minimum number of connections (once per process, retried on
+        later checkouts while the database cannot be reached)
+        """
+        with self._condition:
+            if self._filled:
+                return
+            self._filled = True
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+
+        failed = 0
+        for _ in range(max(missing, 0)):
+            try:
+                conn, created_at = self._open()
+            except psycopg2.Error as e:
+                print(f"Error opening pooled database connection: {str(e)}")
+                failed += 1
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                continue
+            with self._condition:
+                self._idle.append((conn, created_at, created_at))
+                self._condition.notify()
+
+        if failed:
+            with self._condition:
+                self._filled = False
+
+    def _healthy(self, conn, created_at, last_used, now):
+        if conn.closed:
+            return False
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            with self._condition:
+                self._stats['recycled'] += 1
+            return False
+        if self.check_idle is not None and now - last_used > self.check_idle:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                conn.rollback()
+            except psycopg2.Error:
+                with self._condition:
+                    self._stats['failed_checks'] += 1
+                return False
+        return True
+
+    def getconn(self):
+        """Check out a healthy connection, opening one if the pool is below max_size"""
+        self._check_fork()
+        if self._closed:
+            raise PoolClosed('Connection pool is closed')
+        if not self._filled:
+            self._fill()
+
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    if self._closed:
+                        raise PoolClosed('Connection pool is closed')
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f'No database connection free after {self.timeout:g}s')
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._condition.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                else:
+                    conn = None
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn, created_at = self._open()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif not self._healthy(conn, created_at, last_used, time.monotonic()):
+                self._close(conn)
+                continue
+
+            wait_ms = (time.monotonic() - start) * 1000
+            with self._condition:
+                self._created[id(conn)] = created_at
+                self._stats['checkouts'] += 1
+                if waited:
+                    self._stats['waits'] += 1
+                    self._stats['wait_ms_total'] += wait_ms
+                    self._stats['wait_ms_max'] = max(self._stats['wait_ms_max'], wait_ms)
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection; broken, expired or discarded ones are closed"""
+        if os.getpid() != self._pid:
+            return  # Checked out before a fork; the pool was reset since
+
+        with self._condition:
+            created_at = self._created.pop(id(conn), None)
+            closed = self._closed
+        if created_at is None:
+            return
+        if closed:
+            self._close(conn)
+            return
+
+        now = time.monotonic()
+        if not discard and not conn.closed and \
+                conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        if discard or conn.closed or (self.max_lifetime and now - created_at > self.max_lifetime):
+            if not discard and not conn.closed:
+                with self._condition:
+                    self._stats['recycled'] += 1
+            self._close(conn)
+            return
+
+        with self._condition:
+            self._idle.append((conn, created_at, now))
+            self._condition.notify()
+
+    def close(self):
+        """
+        Close the pool: idle connections are closed now, checked-out ones when
+        they are returned, and later checkouts raise PoolClosed
+        """
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def get_stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            waits = stats['waits']
+            stats.update({
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._created),
+                'waiting': self._waiting,
+                'wait_ms_avg': round(stats['wait_ms_total'] / waits, 2) if waits else 0.0,
+                'wait_ms_total': round(stats['wait_ms_total'], 2),
+                'wait_ms_max': round(stats['wait_ms_max'], 2)
+            })
+        return stats
+
+
+# PostgreSQL binary COPY framing and per-type field encoders
+_COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+_COPY_FIELD_ENCODERS = {
+    'int2': struct.Struct('>h').pack,
+    'int4': struct.Struct('>i').pack,
+    'int8': struct.Struct('>q').pack,
+    'float4': struct.Struct('>f').pack,
+    'float8': struct.Struct('>d').pack,
+    'bool': lambda value: b'\x01' if value else b'\x00',
+    'bytea': bytes,
+    'text': lambda value: str(value).encode('utf-8'),
+}
+
+
+def format_copy_text(rows):
+    """
+    Encode rows for COPY ... FROM STDIN (text format)
+    None becomes NULL, bytes become bytea hex literals
+    """
+    def field(value):
+        if value is None:
+            return '\\N'
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return '\\\\x' + bytes(value).hex()
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+    return ''.join('\t'.join(field(value) for value in row) + '\n' for row in rows)
+
+
+def format_copy_binary(rows, types):
+    """
+    Encode rows for COPY ... FROM STDIN WITH (FORMAT binary)
+    Args:
+        types: PostgreSQL type of each column ('int4', 'int8', 'float8',
+            'bool', 'bytea', 'text', ...), which must match the table
+    """
+    encoders = [_COPY_FIELD_ENCODERS[name] for name in types]
+    field_count = struct.pack('>h', len(encoders))
+    parts = [_COPY_SIGNATURE, struct.pack('>ii', 0, 0)]
+    for row in rows:
+        parts.append(field_count)
+        for encode, value in zip(encoders, row):
+            if value is None:
+                parts.append(b'\xff\xff\xff\xff')
+            else:
+                data = encode(value)
+                parts.append(struct.pack('>i', len(data)))
+                parts.append(data)
+    parts.append(b'\xff\xff')
+    return b''.join(parts)
+
+
+def _copy_query(table, columns, binary):
+    return f"COPY {table} ({', '.join(columns)}) FROM STDIN" + (" WITH (FORMAT binary)" if binary else "")
+
+
+class Transaction:
+    """
+    Statements of one unit of work, run on a single connection
+    Same query methods as Database; created by Database.transaction()
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def fetch_one(self, query, params=None):
+        """Fetch single row"""
+        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            result = cursor.fetchone()
+            return dict(result) if result else None
+
+    def fetch_all(self, query, params=None):
+        """Fetch all rows"""
+        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            return [dict(row) for row in results]
+
+    def execute(self, query, params=None):
+        """Execute query (INSERT, UPDATE, DELETE)"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            # For INSERT with RETURNING
+            if query.strip().upper().startswith('INSERT') and 'RETURNING' in query.upper():
+                result = cursor.fetchone()
+                return result[0] if result else None
+            return cursor.rowcount
+
+    def execute_many(self, query, params_list):
+        """Execute batch operations"""
+        with self.connection.cursor() as cursor:
+            cursor.executemany(query, params_list)
+            return cursor.rowcount
+
+    def execute_values(self, query, rows, template=None, page_size=1000, fetch=False):
+        """
+        Multi-row statement: the single %s in `query` is expanded to
+        `page_size` rows of VALUES per round-trip
+        Returns: rows affected, or the RETURNING rows when fetch=True
+        """
+        rows = list(rows)
+        results = []
+        count = 0
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(rows), page_size):
+                page = rows[start:start + page_size]
+                fetched = _execute_values(cursor, query, page, template=template, page_size=len(page), fetch=fetch)
+                if fetch:
+                    results.extend(fetched)
+                count += cursor.rowcount
+        return results if fetch else count
+
+    def copy_in(self, query, data):
+        """Run COPY ... FROM STDIN with bytes, str or a file-like object"""
+        if isinstance(data, str):
+            data = io.StringIO(data)
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            data = io.BytesIO(data)
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(query, data)
+            return cursor.rowcount
+
+    def copy_rows(self, table, columns, rows, types=None):
+        """
+        Bulk-load rows into a table with COPY FROM STDIN
+        Binary format when column `types` are given, text format otherwise
+        """
+        if types is not None:
+            return self.copy_in(_copy_query(table, columns, True), format_copy_binary(rows, types))
+        return self.copy_in(_copy_query(table, columns, False), format_copy_text(rows))
+
+    def copy_out(self, query):
+        """Run COPY (...) TO STDOUT and return the raw output bytes"""
+        buffer = io.BytesIO()
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(query, buffer)
+        return buffer.getvalue()
+
+
 class Database:
     """PostgreSQL database connection and operations"""
 
@@ -26,52 +412,91 @@ class Database:
         if db_password:
             self.config['password'] = db_password
 
+        self.pool = ConnectionPool(
+            self.config,
+            min_size=int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+            max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            timeout=float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+            max_lifetime=float(os.environ.get('DB_POOL_MAX_LIFETIME', '1800')),
+            check_idle=float(os.environ.get('DB_POOL_CHECK_IDLE', '30'))
+        )
+
     @contextmanager
     def get_connection(self):
-        """Get database connection with context manager"""
-        conn = psycopg2.connect(**self.config)
+        """Get a pooled database connection with context manager"""
+        conn = self.pool.getconn()
+        discard = False
         try:
             yield conn
             conn.commit()
         except Exception as e:
-            conn.rollback()
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
             raise e
         finally:
-            conn.close()
+            self.pool.putconn(conn, discard=discard)
+
+    def get_pool_stats(self):
+        """Connection pool counters (size, idle, in_use, waiting, wait times)"""
+        return self.pool.get_stats()
+
+    @contextmanager
+    def transaction(self, tx=None):
+        """
+        Unit of work: statements run through the yielded Transaction share one
+        connection and are committed together when the block exits (rolled
+        back on error). Passing an open transaction joins it instead.
+        """
+        if tx is not None:
+            yield tx
+            return
+        with self.get_connection() as conn:
+            yield Transaction(conn)
 
     def fetch_one(self, query, params=None):
         """Fetch single row"""
-        with self.get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params)
-                result = cursor.fetchone()
-                return dict(result) if result else None
+        with self.transaction() as tx:
+            return tx.fetch_one(query, params)
 
     def fetch_all(self, query, params=None):
         """Fetch all rows"""
-        with self.get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params)
-                results = cursor.fetchall()
-                return [dict(row) for row in results]
+        with self.transaction() as tx:
+            return tx.fetch_all(query, params)
 
     def execute(self, query, params=None):
         """Execute query (INSERT, UPDATE, DELETE)"""
-        with self.get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query, params)
-                # For INSERT with RETURNING
-                if query.strip().upper().startswith('INSERT') and 'RETURNING' in query.upper():
-                    result = cursor.fetchone()
-                    return result[0] if result else None
-                return cursor.rowcount
+        with self.transaction() as tx:
+            return tx.execute(query, params)
 
     def execute_many(self, query, params_list):
         """Execute batch operations"""
-        with self.get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.executemany(query, params_list)
-                return cursor.rowcount
+        with self.transaction() as tx:
+            return tx.execute_many(query, params_list)
+
+    def execute_values(self, query, rows, template=None, page_size=1000, fetch=False):
+        """Multi-row INSERT/UPDATE ... VALUES %s, `page_size` rows per round-trip"""
+        with self.transaction() as tx:
+            return tx.execute_values(query, rows, template, page_size, fetch)
+
+    def copy_in(self, query, data):
+        """Run COPY ... FROM STDIN with bytes, str or a file-like object"""
+        with self.transaction() as tx:
+            return tx.copy_in(query, data)
+
+    def copy_rows(self, table, columns, rows, types=None):
+        """Bulk-load rows with COPY FROM STDIN (binary when column types are given)"""
+        with self.transaction() as tx:
+            return tx.copy_rows(table, columns, rows, types)
+
+    def copy_out(self, query):
+        """
+        Run COPY (...) TO STDOUT and return the raw output bytes
+        Use WITH (FORMAT binary) to get PostgreSQL's binary tuple format
+        """
+        with self.transaction() as tx:
+            return tx.copy_out(query)
 
 
 # Global database instance
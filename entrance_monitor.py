@@ -2,70 +2,257 @@
 Entrance Monitoring System
 Automatically detects and identifies people entering the office
 Marks attendance with cooldown to prevent duplicates
+One process can watch several doors: every camera gets its own capture loop
+and tracker, while the gallery, the inference workers, the attendance writer
+and the cooldown state are shared. Face detection and encoding (dlib holds
+the GIL) run in a pool of recognition processes; tracking and matching stay
+in this process.
 """
 
 import cv2
 import numpy as np
 import time
+import threading
 from datetime import datetime, timedelta
 from services.face_recognition_service import FaceRecognitionService
+from services.face_tracker import FaceTracker
+from services.motion_gate import create_motion_gate
+from services.adaptive_sampler import create_adaptive_sampler
+from services.replay_source import ReplaySource
+from services.recognition_pool import RecognitionPool, detect_image, encode_faces
+from utils.stage_timer import StageTimer
+from services.pipeline import DropOldestQueue, RoundRobinScheduler, StageStats
+from config.camera_config import CameraConfig
+from config.recognition_config import RecognitionConfig
 from models import Attendance
 from database import db
 import sys
 import os
 
+
+class CameraChannel:
+    """
+    Per-camera state: capture handle, tracker, display hand-off and stats
+    The latest-frame slot feeding inference belongs to the monitor's scheduler
+    """
+
+    def __init__(self, name, source, inference_frames, replay=None):
+        self.name = name
+        self.source = source
+        self.replay = replay  # None (live camera), 'native' or 'max' replay speed
+        self.video_capture = None
+        self.frame_count = 0
+        self.processed_frames = 0
+        self.stale_frames = 0  # Frames finished after a newer frame was tracked
+        self.grabbed_only = 0  # Frames skipped without decoding
+        self.reconnects = 0
+        self.started_at = None
+        self.next_display = 0.0
+
+        # Faces are identified once per track, not once per frame
+        self.tracker = FaceTracker(
+            iou_threshold=CameraConfig.TRACK_IOU_THRESHOLD,
+            max_missed=CameraConfig.TRACK_MAX_MISSED,
+            reverify_every=CameraConfig.TRACK_REVERIFY_FRAMES,
+            retry_unknown_every=CameraConfig.TRACK_RETRY_UNKNOWN_FRAMES
+        )
+        self.track_lock = threading.Lock()
+        self.last_tracked_frame = 0
+
+        # Sampling interval and detection scale adapt to the measured latency
+        self.sampler = create_adaptive_sampler(name)
+        self.reported_drops = 0
+
+        # Detection only runs while something moves in front of the camera
+        self.motion_gate = create_motion_gate()
+        self.gate_open = True
+
+        self.inference_frames = inference_frames  # capture -> inference (every Nth frame)
+        self.display_frames = DropOldestQueue(1)  # capture -> display (newest frame only)
+        self.annotations = DropOldestQueue(CameraConfig.ANNOTATION_QUEUE_SIZE)  # inference -> display
+        self.last_annotations = []
+        self.stats = StageStats()
+
+    @property
+    def is_stream(self):
+        """Network stream (RTSP/HTTP) that may drop and be reconnected"""
+        return not self.replay and isinstance(self.source, str) and '://' in self.source
+
+    def _open_capture(self):
+        """Open the capture handle; returns None if the source cannot be opened"""
+        if self.replay:
+            capture = ReplaySource(self.source, realtime=self.replay == 'native')
+        else:
+            if self.is_stream and CameraConfig.LOW_LATENCY_CAPTURE:
+                # Read by OpenCV's FFmpeg backend when the stream is opened
+                os.environ.setdefault('OPENCV_FFMPEG_CAPTURE_OPTIONS', 'fflags;nobuffer|flags;low_delay')
+            capture = cv2.VideoCapture(self.source)
+
+        if not capture.isOpened():
+            capture.release()
+            return None
+
+        if not self.replay:
+            # Set camera properties for better performance
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+
+            # Low latency: keep at most one frame buffered in the driver/decoder
+            if CameraConfig.LOW_LATENCY_CAPTURE:
+                capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return capture
+
+    def start_camera(self):
+        """Initialize camera connection"""
+        try:
+            self.video_capture = self._open_capture()
+
+            if self.video_capture is None:
+                print(f"Error: Could not open camera {self.source}")
+                return False
+
+            self.started_at = time.monotonic()
+            print(f"Camera {self.name} ({self.source}) started successfully")
+            return True
+
+        except Exception as e:
+            print(f"Error starting camera {self.name}: {str(e)}")
+            return False
+
+    def reconnect(self, running):
+        """
+        Reopen a dropped stream with exponential backoff
+        Returns: False if the monitor stopped before the stream came back
+        """
+        self.video_capture.release()
+        delay = CameraConfig.RECONNECT_INITIAL_DELAY
+
+        while running.is_set():
+            print(f"Camera {self.name}: stream lost, reconnecting in {delay:.0f}s")
+            deadline = time.monotonic() + delay
+            while running.is_set() and time.monotonic() < deadline:
+                time.sleep(0.1)
+            if not running.is_set():
+                break
+
+            try:
+                capture = self._open_capture()
+            except Exception as e:
+                print(f"Camera {self.name}: reconnect failed: {str(e)}")
+                capture = None
+
+            if capture is not None:
+                self.video_capture = capture
+                self.reconnects += 1
+                print(f"Camera {self.name}: reconnected")
+                return True
+            delay = min(delay * 2, CameraConfig.RECONNECT_MAX_DELAY)
+
+        return False
+
+    def stop_camera(self):
+        """Release camera resources"""
+        if self.video_capture:
+            self.video_capture.release()
+
+    def get_stats(self):
+        """Capture/processing fps, queue counters and per-stage latency of this camera"""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0
+        return {
+            'source': self.source,
+            'frames_captured': self.frame_count,
+            'frames_processed': self.processed_frames,
+            'capture_fps': round(self.frame_count / elapsed, 2) if elapsed else 0.0,
+            'processed_fps': round(self.processed_frames / elapsed, 2) if elapsed else 0.0,
+            'stale_frames': self.stale_frames,
+            'frames_decoded': self.frame_count - self.grabbed_only,
+            'reconnects': self.reconnects,
+            'motion_gate': self.motion_gate.get_stats() if self.motion_gate else None,
+            'sampler': self.sampler.get_stats(),
+            'queues': {
+                'inference': self.inference_frames.get_stats(),
+                'annotations': self.annotations.get_stats()
+            },
+            'stages': self.stats.as_dict(),
+            'tracker': self.tracker.get_stats()
+        }
+
+
 class EntranceMonitor:
     """
     Real-time entrance monitoring system for automatic attendance
+    Runs as a staged pipeline so a slow camera read or database round-trip
+    never stalls the other stages:
+        capture thread per camera -> latest frame slot (older frames are dropped)
+        shared inference pool     -> detect, track, identify; annotations to the display
+                                     (detection and encoding in recognition processes)
+        attendance writer         <- bounded drop-oldest queue of check-in events
+    Inference workers take frames from the cameras in round-robin order, and
+    the cooldown is shared, so walking past two doors marks attendance once.
+    The main thread only renders the newest frame with the newest annotations.
     """
 
-    def __init__(self, camera_source=0, cooldown_minutes=5):
+    def __init__(self, camera_source=0, cooldown_minutes=5, headless=False, replay=None):
         """
         Initialize entrance monitor
 
         Args:
-            camera_source: Camera index (0 for default webcam) or IP camera URL
+            camera_source: Camera index (0 for default webcam) or IP camera URL,
+                or a list of them to supervise several doors
             cooldown_minutes: Minutes to wait before allowing same person to mark attendance again
+            headless: run without any window (servers, CI)
+            replay: treat the sources as video files / image directories and play
+                them at 'native' frame rate or as fast as inference keeps up ('max')
         """
         self.camera_source = camera_source
         self.cooldown_minutes = cooldown_minutes
+        self.headless = headless
+        self.replay = replay
         self.face_service = FaceRecognitionService()
-        self.last_recognition = {}  # user_id -> timestamp
-        self.process_every_n_frames = 5  # Process every 5th frame for performance
-        self.frame_count = 0
-
-        # Video capture
-        self.video_capture = None
+        self.last_recognition = {}  # user_id -> timestamp, shared by every camera
+
+        # One channel per camera; inference frames are scheduled fairly across them
+        sources = camera_source if isinstance(camera_source, (list, tuple)) else [camera_source]
+        self.scheduler = RoundRobinScheduler(len(sources))
+        self.cameras = [
+            CameraChannel(f"cam{i}" if len(sources) > 1 else str(source), source, slot, replay)
+            for i, (source, slot) in enumerate(zip(sources, self.scheduler.slots))
+        ]
+
+        # Shared pipeline stages; each inference thread drives one recognition process
+        self.inference_workers = max(1, CameraConfig.INFERENCE_WORKERS)
+        self.recognition_pool = RecognitionPool(
+            workers=self.inference_workers,
+            max_queue=self.inference_workers,
+            task_timeout=RecognitionConfig.RECOGNITION_TASK_TIMEOUT
+        )
+        self.attendance_queue = DropOldestQueue(CameraConfig.ATTENDANCE_QUEUE_SIZE)  # inference -> writer
+        self.stats = StageStats()
+        self.stats_interval = CameraConfig.PIPELINE_STATS_INTERVAL
+        self._running = threading.Event()
+        self._started_at = None
+        self._threads = []
+        self._capture_threads = []
+        self.active_cameras = []
+        self._cooldown_lock = threading.Lock()
 
         # Display settings
         self.font = cv2.FONT_HERSHEY_DUPLEX
         self.font_scale = 0.6
         self.font_thickness = 1
 
-    def start_camera(self):
-        """Initialize camera connection"""
-        try:
-            self.video_capture = cv2.VideoCapture(self.camera_source)
-
-            if not self.video_capture.isOpened():
-                print(f"Error: Could not open camera {self.camera_source}")
-                return False
+    def start_cameras(self):
+        """Open every camera; cameras that fail to open are left out"""
+        opened = [camera for camera in self.cameras if camera.start_camera()]
+        if len(opened) < len(self.cameras):
+            print(f"Warning: {len(self.cameras) - len(opened)} camera(s) could not be opened")
+        self.active_cameras = opened
+        return len(opened) > 0
 
-            # Set camera properties for better performance
-            self.video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-
-            print(f"Camera {self.camera_source} started successfully")
-            return True
-
-        except Exception as e:
-            print(f"Error starting camera: {str(e)}")
-            return False
-
-    def stop_camera(self):
+    def stop_cameras(self):
         """Release camera resources"""
-        if self.video_capture:
-            self.video_capture.release()
+        for camera in self.cameras:
+            camera.stop_camera()
         cv2.destroyAllWindows()
 
     def is_in_cooldown(self, user_id):
@@ -89,30 +276,46 @@ class EntranceMonitor:
 
         return max(0, remaining)
 
-    def mark_attendance(self, user_id, full_name, employee_id):
-        """Mark attendance for recognized user"""
-        try:
-            # Check cooldown
+    def mark_attendance(self, user_id, full_name, employee_id, camera_name=None):
+        """
+        Queue an attendance check-in for a recognized user
+        The cooldown starts when the event is queued so the same person is not
+        queued again (from any camera) while the writer catches up; it is
+        released if the write fails or the event is dropped
+        """
+        with self._cooldown_lock:
             if self.is_in_cooldown(user_id):
                 remaining = self.get_cooldown_remaining(user_id)
-                print(f"User {full_name} is in cooldown. {int(remaining)}s remaining")
                 return False, f"Cooldown active: {int(remaining)}s remaining"
-
-            # Mark attendance in database
-            success, message = Attendance.mark_attendance(user_id)
-
-            if success:
-                # Update last recognition time
-                self.last_recognition[user_id] = datetime.now()
-                print(f"✓ Attendance marked for {full_name} ({employee_id})")
-                return True, "Attendance marked successfully"
-            else:
-                print(f"✗ Failed to mark attendance for {full_name}: {message}")
-                return False, message
-
+            timestamp = datetime.now()
+            self.last_recognition[user_id] = timestamp
+
+        dropped = self.attendance_queue.put((user_id, full_name, employee_id, timestamp, camera_name))
+        if dropped:
+            print(f"Attendance queue full, dropped check-in for {dropped[1]}")
+            self._release_cooldown(dropped[0], dropped[3])
+        return True, "Attendance queued"
+
+    def _release_cooldown(self, user_id, timestamp):
+        with self._cooldown_lock:
+            if self.last_recognition.get(user_id) == timestamp:
+                del self.last_recognition[user_id]
+
+    def _persist_attendance(self, event):
+        """Write one queued check-in to the database (attendance writer thread)"""
+        user_id, full_name, employee_id, timestamp, camera_name = event
+        try:
+            success, message = Attendance.mark_attendance(user_id, timestamp)
         except Exception as e:
-            print(f"Error marking attendance: {str(e)}")
-            return False, str(e)
+            success, message = False, str(e)
+
+        where = f" at {camera_name}" if camera_name and len(self.cameras) > 1 else ""
+        if success:
+            print(f"✓ Attendance marked for {full_name} ({employee_id}){where}")
+        else:
+            print(f"✗ Failed to mark attendance for {full_name}{where}: {message}")
+            self._release_cooldown(user_id, timestamp)
+        return success
 
     def draw_face_box(self, frame, face_location, label, color, sub_label=None):
         """Draw bounding box and label on frame"""
@@ -132,31 +335,72 @@ class EntranceMonitor:
             cv2.putText(frame, sub_label, (left + 6, bottom + 18), self.font,
                        0.5, (255, 255, 255), 1)
 
-    def process_frame(self, frame):
-        """Process a single frame for face recognition"""
-        # Resize frame for faster processing
-        small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
+    def draw_annotations(self, frame, annotations):
+        """Draw (face_location, label, color, sub_label) annotations on a frame"""
+        for face_location, label, color, sub_label in annotations:
+            self.draw_face_box(frame, face_location, label, color, sub_label)
+        return frame
+
+    def process_frame(self, frame, frame_id=None, camera=None):
+        """
+        Detect, track and identify the faces in a frame from one camera
+        Returns: list of (face_location, label, color, sub_label) annotations,
+        or None if a newer frame of that camera was already tracked
+        """
+        camera = camera or self.cameras[0]
+
+        # Pick up newly enrolled users (reloads in the background)
+        self.face_service.check_for_updates()
+
+        start = time.perf_counter()
+        # Resize frame for faster processing (scale chosen by the adaptive sampler)
+        scale = camera.sampler.scale
+        small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
 
         # Convert to RGB for face_recognition library
         rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
 
-        # Find face locations
-        import face_recognition
-        face_locations = face_recognition.face_locations(rgb_small_frame, model='hog')
+        # Find face locations (in a recognition process)
+        face_locations = self.recognition_pool.run(detect_image, rgb_small_frame)
 
         # Scale back up face locations
-        face_locations = [(top*2, right*2, bottom*2, left*2) for (top, right, bottom, left) in face_locations]
-
-        # Process each detected face
-        for face_location in face_locations:
-            # Identify face
-            result = self.face_service.identify_face(frame)
-
-            if result['success']:
+        face_locations = [tuple(int(v / scale) for v in location) for location in face_locations]
+        camera.stats.time('detect', start)
+
+        # Follow faces across frames; only new or due tracks are encoded
+        with camera.track_lock:
+            if frame_id is not None:
+                if frame_id < camera.last_tracked_frame:
+                    camera.stale_frames += 1
+                    return None
+                camera.last_tracked_frame = frame_id
+            tracks = camera.tracker.update(face_locations)
+            pending = camera.tracker.select_for_identification(tracks)
+            epochs = [tracks[i].epoch for i in pending]
+
+        if pending:
+            start = time.perf_counter()
+            timer = StageTimer()
+            results = self._identify_pending(frame, [face_locations[i] for i in pending], timer)
+            camera.stats.time('identify', start)
+            for stage in ('encode', 'match'):
+                if stage in timer.timings:
+                    camera.stats.record(stage, timer.timings[stage])
+            with camera.track_lock:
+                for i, epoch, result in zip(pending, epochs, results):
+                    camera.tracker.assign(tracks[i], result, epoch)
+
+        # Label each detected face with its track's identity
+        annotations = []
+        for face_location, track in zip(face_locations, tracks):
+            result = track.result
+            if result is None:
+                # Being identified by another worker
+                annotations.append((face_location, "Identifying...", (128, 128, 128), None))
+            elif result['success']:
                 user_id = result['user_id']
                 full_name = result['full_name']
                 employee_id = result['employee_id']
-                confidence = result['confidence']
 
                 # Check if in cooldown
                 if self.is_in_cooldown(user_id):
@@ -165,8 +409,8 @@ class EntranceMonitor:
                     sub_label = f"{remaining}s remaining"
                     color = (0, 165, 255)  # Orange
                 else:
-                    # Try to mark attendance
-                    success, message = self.mark_attendance(user_id, full_name, employee_id)
+                    # Queue the check-in for the attendance writer
+                    success, message = self.mark_attendance(user_id, full_name, employee_id, camera.name)
 
                     if success:
                         label = f"{full_name} - CHECKED IN"
@@ -177,56 +421,306 @@ class EntranceMonitor:
                         sub_label = message
                         color = (0, 165, 255)  # Orange
 
-                self.draw_face_box(frame, face_location, label, color, sub_label)
+                annotations.append((face_location, label, color, sub_label))
             else:
                 # Unknown face
                 label = "Unknown"
                 sub_label = result.get('message', '')[:30]
                 color = (0, 0, 255)  # Red
-                self.draw_face_box(frame, face_location, label, color, sub_label)
+                annotations.append((face_location, label, color, sub_label))
 
-        return frame
+        return annotations
+
+    def _identify_pending(self, frame, face_locations, timer):
+        """
+        Encode the faces of due tracks in a recognition process, then match
+        them against the gallery here in one search
+        Returns: one result dict per face; a failure result when the pool fails,
+        so the tracks are retried instead of staying "Identifying..."
+        """
+        try:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with timer.stage('encode'):
+                encodings = self.recognition_pool.run(encode_faces, rgb_frame, face_locations)
+            with timer.stage('match'):
+                results = self.face_service.match_encodings(encodings)
+        except Exception as e:
+            results = [{
+                'success': False,
+                'message': f'Error during face recognition: {str(e)}'
+            } for _ in face_locations]
+
+        for location, result in zip(face_locations, results):
+            result['location'] = location
+        return results
+
+    def _capture_loop(self, camera):
+        """
+        Capture stage of one camera: keep only the newest frame for display and inference
+        Every frame is grabbed, but only frames that will be analysed or shown
+        are decoded (retrieve); the rest are skipped without decoding
+        """
+        display_interval = 1.0 / CameraConfig.DISPLAY_MAX_FPS if CameraConfig.DISPLAY_MAX_FPS > 0 else 0
+        while self._running.is_set():
+            start = time.perf_counter()
+            grabbed = camera.video_capture.grab()
+
+            if not grabbed:
+                if camera.replay:
+                    print(f"Replay of {camera.source} finished")
+                elif camera.is_stream and self._running.is_set():
+                    if camera.reconnect(self._running):
+                        continue
+                else:
+                    print(f"Error: Failed to capture frame from camera {camera.name}")
+                break
+            # Includes waiting for the next frame of a live camera
+            camera.stats.time('grab', start)
+
+            camera.frame_count += 1
+            captured_at = time.perf_counter()
+            sampled = camera.sampler.should_sample()
+            display_due = not self.headless and captured_at >= camera.next_display
+            if not (sampled or display_due):
+                camera.grabbed_only += 1
+                camera.sampler.adjust()
+                continue
+
+            start = time.perf_counter()
+            ret, frame = camera.video_capture.retrieve()
+            if not ret:
+                camera.grabbed_only += 1
+                continue
+            camera.stats.time('decode', start)
+
+            if display_due:
+                camera.display_frames.put(frame)
+                camera.next_display = captured_at + display_interval
+
+            # Process every Nth frame, N adapted to the measured latency
+            if sampled and self._motion_check(camera, frame):
+                if camera.replay == 'max':
+                    # Unthrottled replay: wait for a worker instead of dropping frames
+                    while self._running.is_set() and not camera.inference_frames.wait_taken(0.5):
+                        pass
+                camera.inference_frames.put((camera.frame_count, captured_at, frame))
+
+                # Sampled frames overwritten before a worker took them mean inference is behind
+                dropped = camera.inference_frames.dropped
+                if dropped > camera.reported_drops:
+                    camera.sampler.record_drop(dropped - camera.reported_drops)
+                    camera.reported_drops = dropped
+            camera.sampler.adjust()
+
+        if camera.replay == 'max':
+            camera.inference_frames.wait_taken(5.0)
+
+        # The monitor keeps running while any camera is still capturing
+        if not any(thread.is_alive() for thread in self._capture_threads if thread is not threading.current_thread()):
+            self._running.clear()
+
+    def _motion_check(self, camera, frame):
+        """Run the camera's motion gate; clears the overlay when the scene goes still"""
+        if camera.motion_gate is None:
+            return True
+
+        start = time.perf_counter()
+        passed = camera.motion_gate.check(frame)
+        camera.stats.time('motion', start)
+
+        if camera.gate_open and not passed:
+            camera.annotations.put([])
+        camera.gate_open = passed
+        return passed
+
+    def _inference_loop(self):
+        """Inference stage: one of `inference_workers` threads shared by every camera"""
+        while self._running.is_set():
+            index, item = self.scheduler.take(timeout=0.5)
+            if item is None:
+                continue
+
+            camera = self.cameras[index]
+            frame_id, captured_at, frame = item
+            try:
+                annotations = self.process_frame(frame, frame_id, camera)
+            except Exception as e:
+                print(f"Error processing frame from camera {camera.name}: {str(e)}")
+                continue
+
+            if annotations is not None:
+                camera.processed_frames += 1
+                camera.annotations.put(annotations)
+                camera.stats.time('frame_latency', captured_at)
+                camera.sampler.record((time.perf_counter() - captured_at) * 1000)
+
+    def _attendance_loop(self):
+        """Persistence stage: write queued check-ins; flushes the queue on shutdown"""
+        while self._running.is_set() or len(self.attendance_queue):
+            event = self.attendance_queue.get(timeout=0.5)
+            if event is None:
+                continue
+
+            start = time.perf_counter()
+            self._persist_attendance(event)
+            self.stats.time('persist', start)
+
+    def start_pipeline(self):
+        """Start the capture threads, the inference workers and the attendance writer"""
+        # Load the detector and dlib models in every recognition process first
+        self.recognition_pool.warm_up()
+        self._running.set()
+        self._started_at = time.monotonic()
+        self._capture_threads = [
+            threading.Thread(target=self._capture_loop, args=(camera,),
+                             name=f"monitor-capture-{camera.name}", daemon=True)
+            for camera in self.active_cameras
+        ]
+        workers = [
+            threading.Thread(target=self._inference_loop, name=f"monitor-inference-{i}", daemon=True)
+            for i in range(self.inference_workers)
+        ]
+        writer = threading.Thread(target=self._attendance_loop, name="monitor-attendance", daemon=True)
+
+        self._threads = self._capture_threads + workers + [writer]
+        for thread in self._threads:
+            thread.start()
+
+    def stop_pipeline(self, timeout=5.0):
+        """Stop every stage; the attendance writer flushes what is still queued"""
+        self._running.clear()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.recognition_pool.shutdown()
+
+    def get_stats(self):
+        """Per-camera fps and latency plus the shared queue and writer stats"""
+        return {
+            'cameras': {camera.name: camera.get_stats() for camera in self.cameras},
+            'scheduled_frames': dict(zip((camera.name for camera in self.cameras), self.scheduler.served)),
+            'queues': {'attendance': self.attendance_queue.get_stats()},
+            'stages': self.stats.as_dict()
+        }
+
+    def print_stats(self):
+        """Print a one-screen summary of the pipeline stats"""
+        stats = self.get_stats()
+        print("\n[pipeline]")
+        for name, camera in stats['cameras'].items():
+            stages = camera['stages']
+            latency = stages.get('frame_latency', {})
+            print(f"  camera {name:<8} capture={camera['capture_fps']:.1f}fps "
+                  f"processed={camera['processed_fps']:.1f}fps "
+                  f"latency avg={latency.get('avg_ms', 0):.1f}ms max={latency.get('max_ms', 0):.1f}ms "
+                  f"dropped={camera['queues']['inference']['dropped']} stale={camera['stale_frames']}")
+            sampler = camera['sampler']
+            print(f"  {'':15} sampling: every {sampler['interval']} frame(s) at scale {sampler['scale']:g}, "
+                  f"decoded {camera['frames_decoded']}/{camera['frames_captured']}, "
+                  f"reconnects={camera['reconnects']}")
+            if camera['motion_gate']:
+                gate = camera['motion_gate']
+                print(f"  {'':15} motion gate: passed={gate['frames_passed']} gated={gate['frames_gated']} "
+                      f"({gate['gated_ratio']:.0%} skipped)")
+        attendance = stats['queues']['attendance']
+        persist = stats['stages'].get('persist', {})
+        print(f"  attendance depth={attendance['depth']}/{attendance['maxsize']} "
+              f"dropped={attendance['dropped']} persist avg={persist.get('avg_ms', 0):.1f}ms")
+
+    def print_report(self):
+        """
+        Benchmark report: frames processed, effective fps and latency
+        percentiles of every stage over all cameras
+        """
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0
+        captured = sum(camera.frame_count for camera in self.cameras)
+        processed = sum(camera.processed_frames for camera in self.cameras)
+
+        stages = StageStats()
+        for camera in self.cameras:
+            stages.merge(camera.stats)
+        stages.merge(self.stats)
+        summary = stages.as_dict()
+
+        print("\n" + "="*60)
+        print("BENCHMARK REPORT")
+        print("="*60)
+        print(f"Wall time:        {elapsed:.1f}s")
+        print(f"Frames captured:  {captured} ({captured / elapsed if elapsed else 0:.1f} fps)")
+        print(f"Frames processed: {processed} ({processed / elapsed if elapsed else 0:.1f} fps effective)")
+        print(f"\n{'stage':<16} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        print("-"*63)
+        labels = [('grab', 'grab'), ('decode', 'decode'), ('motion', 'motion gate'), ('detect', 'detect'),
+                  ('encode', 'encode'), ('match', 'match'), ('persist', 'db'), ('frame_latency', 'end-to-end')]
+        for stage, label in labels:
+            if stage not in summary:
+                continue
+            percentiles = stages.percentiles(stage)
+            print(f"{label:<16} {summary[stage]['count']:>7} {percentiles['p50']:>9.1f} "
+                  f"{percentiles['p95']:>9.1f} {percentiles['p99']:>9.1f} {summary[stage]['max_ms']:>9.1f}")
+        print("="*60)
+
+    def _show(self, camera):
+        """Render the newest frame of a camera with its newest annotations"""
+        frame = camera.display_frames.get(timeout=0)
+        if frame is None:
+            return False
+        # The inference stage may still be reading this frame
+        frame = frame.copy()
+
+        # Keep the newest annotations until the next processed frame
+        pending = camera.annotations.drain()
+        if pending:
+            camera.last_annotations = pending[-1]
+        self.draw_annotations(frame, camera.last_annotations)
+
+        # Add timestamp and info to frame
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cv2.putText(frame, timestamp, (10, 30), self.font, 0.7, (255, 255, 255), 2)
+        cv2.putText(frame, "Press 'q' to quit", (10, frame.shape[0] - 10),
+                   self.font, 0.5, (255, 255, 255), 1)
+
+        # Display frame
+        title = 'Entrance Monitor' if len(self.cameras) == 1 else f'Entrance Monitor - {camera.name}'
+        cv2.imshow(title, frame)
+        return True
 
     def run(self):
-        """Main monitoring loop"""
+        """Main monitoring loop (display stage)"""
         print("="*60)
         print("ENTRANCE MONITORING SYSTEM")
         print("="*60)
-        print(f"Camera Source: {self.camera_source}")
+        for camera in self.cameras:
+            print(f"Camera Source: {camera.source}" + (f" ({camera.name})" if len(self.cameras) > 1 else ""))
         print(f"Cooldown Period: {self.cooldown_minutes} minutes")
-        print(f"Press 'q' to quit")
+        print(f"Inference Workers: {self.inference_workers}")
+        if self.replay:
+            print(f"Replay Speed: {self.replay}")
+        print("Press Ctrl+C to quit" if self.headless else "Press 'q' to quit")
         print("="*60)
 
-        # Start camera
-        if not self.start_camera():
+        # Start cameras
+        if not self.start_cameras():
             return
 
-        try:
-            while True:
-                # Capture frame
-                ret, frame = self.video_capture.read()
-
-                if not ret:
-                    print("Error: Failed to capture frame")
-                    break
-
-                self.frame_count += 1
-
-                # Process every Nth frame to improve performance
-                if self.frame_count % self.process_every_n_frames == 0:
-                    frame = self.process_frame(frame)
+        self.start_pipeline()
+        last_stats = time.monotonic()
 
-                # Add timestamp and info to frame
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                cv2.putText(frame, timestamp, (10, 30), self.font, 0.7, (255, 255, 255), 2)
-                cv2.putText(frame, "Press 'q' to quit", (10, frame.shape[0] - 10),
-                           self.font, 0.5, (255, 255, 255), 1)
+        try:
+            while self._running.is_set():
+                if self.headless:
+                    time.sleep(0.1)
+                else:
+                    shown = [self._show(camera) for camera in self.active_cameras]
+                    if not any(shown):
+                        time.sleep(0.005)
 
-                # Display frame
-                cv2.imshow('Entrance Monitor', frame)
+                if self.stats_interval and time.monotonic() - last_stats >= self.stats_interval:
+                    self.print_stats()
+                    last_stats = time.monotonic()
 
                 # Check for quit command
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if not self.headless and cv2.waitKey(1) & 0xFF == ord('q'):
                     print("\nShutting down...")
                     break
 
@@ -235,33 +729,68 @@ class EntranceMonitor:
         except Exception as e:
             print(f"\nError in monitoring loop: {str(e)}")
         finally:
-            self.stop_camera()
+            self.stop_pipeline()
+            self.print_stats()
+            if self.headless or self.replay:
+                self.print_report()
+            self.stop_cameras()
             print("Camera stopped. Goodbye!")
 
 
+def parse_camera_source(source):
+    """Camera index as int, anything else (IP camera URL, file) as string"""
+    try:
+        return int(source)
+    except ValueError:
+        return source  # Keep as string for IP camera URLs
+
+
+def read_camera_list(path):
+    """Read camera sources from a file, one per line ('#' starts a comment)"""
+    sources = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                sources.append(parse_camera_source(line))
+    return sources
+
+
 def main():
     """Main entry point"""
     import argparse
 
     parser = argparse.ArgumentParser(description='Entrance Monitoring System')
-    parser.add_argument('--camera', type=str, default='0',
-                       help='Camera source (0 for default webcam, or IP camera URL)')
+    parser.add_argument('--camera', type=str, action='append',
+                       help='Camera source (0 for default webcam, or IP camera URL); repeat for several doors')
+    parser.add_argument('--cameras', type=str,
+                       help='File listing camera sources, one per line (supervisor mode)')
     parser.add_argument('--cooldown', type=int, default=5,
                        help='Cooldown period in minutes (default: 5)')
+    parser.add_argument('--headless', action='store_true',
+                       help='Run without a window and print a benchmark report on exit')
+    parser.add_argument('--replay', type=str, action='append',
+                       help='Replay a video file or image directory instead of a camera; repeatable')
+    parser.add_argument('--replay-speed', choices=['native', 'max'], default='native',
+                       help="'native' = recording frame rate, 'max' = as fast as inference keeps up")
 
     args = parser.parse_args()
 
-    # Convert camera source to int if it's a number
-    camera_source = args.camera
-    try:
-        camera_source = int(camera_source)
-    except ValueError:
-        pass  # Keep as string for IP camera URLs
+    if args.replay:
+        camera_sources = list(args.replay)
+    else:
+        camera_sources = [parse_camera_source(source) for source in (args.camera or [])]
+        if args.cameras:
+            camera_sources += read_camera_list(args.cameras)
+        if not camera_sources:
+            camera_sources = [0]
 
     # Create and run monitor
     monitor = EntranceMonitor(
-        camera_source=camera_source,
-        cooldown_minutes=args.cooldown
+        camera_source=camera_sources[0] if len(camera_sources) == 1 else camera_sources,
+        cooldown_minutes=args.cooldown,
+        headless=args.headless,
+        replay=args.replay_speed if args.replay else None
     )
 
     monitor.run()
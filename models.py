@@ -1,41 +1,41 @@
 from database import db
 from datetime import datetime, timedelta
-import pickle
+from utils.encoding_codec import encode_encoding
 
 class User:
     """User model for database operations"""
 
     @staticmethod
-    def find_by_username(username):
+    def find_by_username(username, tx=None):
         """Find user by username"""
         query = "SELECT * FROM users WHERE username = %s"
-        return db.fetch_one(query, (username,))
+        return (tx or db).fetch_one(query, (username,))
 
     @staticmethod
-    def find_by_email(email):
+    def find_by_email(email, tx=None):
         """Find user by email"""
         query = "SELECT * FROM users WHERE email = %s"
-        return db.fetch_one(query, (email,))
+        return (tx or db).fetch_one(query, (email,))
 
     @staticmethod
-    def find_by_id(user_id):
+    def find_by_id(user_id, tx=None):
         """Find user by ID"""
         query = "SELECT id, username, email, role, full_name, employee_id, is_active FROM users WHERE id = %s"
-        return db.fetch_one(query, (user_id,))
+        return (tx or db).fetch_one(query, (user_id,))
 
     @staticmethod
-    def create_user(username, email, password_hash, full_name, employee_id, role='user'):
+    def create_user(username, email, password_hash, full_name, employee_id, role='user', tx=None):
         """Create new user"""
         query = """
             INSERT INTO users (username, email, password_hash, full_name, employee_id, role)
             VALUES (%s, %s, %s, %s, %s, %s)
             RETURNING id
         """
-        result = db.execute(query, (username, email, password_hash, full_name, employee_id, role))
+        result = (tx or db).execute(query, (username, email, password_hash, full_name, employee_id, role))
         return result
 
     @staticmethod
-    def update_user(user_id, data):
+    def update_user(user_id, data, tx=None):
         """Update user information"""
         # Build dynamic update query
         fields = []
@@ -49,39 +49,61 @@ class User:
 
         values.append(user_id)
         query = f"UPDATE users SET {', '.join(fields)} WHERE id = %s"
-        db.execute(query, tuple(values))
+        (tx or db).execute(query, tuple(values))
 
     @staticmethod
-    def deactivate_user(user_id):
+    def deactivate_user(user_id, tx=None):
         """Deactivate user"""
         query = "UPDATE users SET is_active = FALSE WHERE id = %s"
-        db.execute(query, (user_id,))
+        (tx or db).execute(query, (user_id,))
 
     @staticmethod
-    def get_all_users():
+    def get_all_users(tx=None):
         """Get all users"""
         query = "SELECT id, username, email, role, full_name, employee_id, is_active FROM users ORDER BY created_at DESC"
-        return db.fetch_all(query)
+        return (tx or db).fetch_all(query)
 
     @staticmethod
-    def save_facial_encodings(user_id, encodings, photo_paths):
-        """Save facial encodings for a user"""
-        # Delete existing encodings
-        delete_query = "DELETE FROM facial_encodings WHERE user_id = %s"
-        db.execute(delete_query, (user_id,))
+    def save_facial_encodings(user_id, encodings, photo_paths, tx=None):
+        """Replace the facial encodings of a user (one transaction)"""
+        User.bulk_save_facial_encodings([(user_id, encodings, photo_paths)], tx=tx)
 
-        # Insert new encodings
-        insert_query = """
-            INSERT INTO facial_encodings (user_id, encoding, photo_path)
-            VALUES (%s, %s, %s)
+    @staticmethod
+    def bulk_save_facial_encodings(enrollments, tx=None):
+        """
+        Replace the facial encodings of many users in one transaction: one
+        DELETE and one binary COPY regardless of the number of rows
+        Args:
+            enrollments: iterable of (user_id, encodings, photo_paths)
+        Returns: number of encodings written
         """
-        for encoding, photo_path in zip(encodings, photo_paths):
-            # Serialize numpy array
-            encoding_bytes = pickle.dumps(encoding)
-            db.execute(insert_query, (user_id, encoding_bytes, photo_path))
+        user_ids = []
+        rows = []
+        for user_id, encodings, photo_paths in enrollments:
+            user_ids.append(int(user_id))
+            # Fixed-width little-endian float32 records
+            rows.extend(
+                (int(user_id), encode_encoding(encoding), photo_path)
+                for encoding, photo_path in zip(encodings, photo_paths)
+            )
+        if not user_ids:
+            return 0
+
+        with db.transaction(tx) as tx:
+            tx.execute("DELETE FROM facial_encodings WHERE user_id = ANY(%s)", (user_ids,))
+            if rows:
+                tx.copy_rows('facial_encodings', ('user_id', 'encoding', 'photo_path'), rows,
+                             types=('int4', 'bytea', 'text'))
+        return len(rows)
 
     @staticmethod
-    def get_all_facial_encodings():
+    def get_facial_encodings(user_id, tx=None):
+        """Get all facial encodings of one user"""
+        query = "SELECT user_id, encoding FROM facial_encodings WHERE user_id = %s"
+        return (tx or db).fetch_all(query, (user_id,))
+
+    @staticmethod
+    def get_all_facial_encodings(tx=None):
         """Get all facial encodings with user information"""
         query = """
             SELECT fe.user_id, fe.encoding, u.full_name, u.employee_id
@@ -89,7 +111,36 @@ class User:
             JOIN users u ON fe.user_id = u.id
             WHERE u.is_active = TRUE
         """
-        return db.fetch_all(query)
+        return (tx or db).fetch_all(query)
+
+    @staticmethod
+    def copy_all_facial_encodings(tx=None):
+        """
+        Bulk-export (user_id, encoding) of every active user with binary COPY
+        Rows are ordered by user so each user's encodings are contiguous
+        Returns: raw binary COPY bytes (see utils.encoding_codec.decode_copy_rows)
+        """
+        query = """
+            COPY (
+                SELECT fe.user_id, fe.encoding
+                FROM facial_encodings fe
+                JOIN users u ON fe.user_id = u.id
+                WHERE u.is_active = TRUE
+                ORDER BY fe.user_id, fe.id
+            ) TO STDOUT WITH (FORMAT binary)
+        """
+        return (tx or db).copy_out(query)
+
+    @staticmethod
+    def get_enrolled_users(tx=None):
+        """Get name and employee ID of every active user that has facial encodings"""
+        query = """
+            SELECT u.id, u.full_name, u.employee_id
+            FROM users u
+            WHERE u.is_active = TRUE
+              AND EXISTS (SELECT 1 FROM facial_encodings fe WHERE fe.user_id = u.id)
+        """
+        return (tx or db).fetch_all(query)
 
 
 class Attendance:
@@ -108,7 +159,7 @@ class Attendance:
         return [Attendance._convert_decimals(record) for record in records]
 
     @staticmethod
-    def create_attendance(user_id, date, entry_time=None, exit_time=None, status='present'):
+    def create_attendance(user_id, date, entry_time=None, exit_time=None, status='present', tx=None):
         """Create attendance record"""
         query = """
             INSERT INTO attendance (user_id, date, entry_time, exit_time, status)
@@ -119,11 +170,76 @@ class Attendance:
                 status = EXCLUDED.status
             RETURNING id
         """
-        result = db.execute(query, (user_id, date, entry_time, exit_time, status))
+        result = (tx or db).execute(query, (user_id, date, entry_time, exit_time, status))
         return result
 
+    # Record detections of a list of users at one timestamp: the first
+    # detection of the day inserts the entry time; later ones advance
+    # exit_time (out-of-order events never move it back) and recompute
+    # total_hours, all in one statement
+    _DETECTION_UPSERT = """
+        INSERT INTO attendance (user_id, date, entry_time, status)
+        SELECT user_id, %(date)s, %(ts)s, 'present'
+        FROM unnest(%(user_ids)s::int[]) AS user_id
+        ON CONFLICT (user_id, date) DO UPDATE
+        SET entry_time = LEAST(COALESCE(attendance.entry_time, EXCLUDED.entry_time), EXCLUDED.entry_time),
+            exit_time = GREATEST(COALESCE(attendance.exit_time, EXCLUDED.entry_time), EXCLUDED.entry_time),
+            total_hours = ROUND((EXTRACT(EPOCH FROM (
+                GREATEST(COALESCE(attendance.exit_time, EXCLUDED.entry_time), EXCLUDED.entry_time)
+                - LEAST(COALESCE(attendance.entry_time, EXCLUDED.entry_time), EXCLUDED.entry_time)
+            )) / 3600)::numeric, 2)
+        RETURNING id, user_id, (xmax = 0) AS inserted, total_hours
+    """
+
     @staticmethod
-    def update_attendance(attendance_id, data):
+    def mark_attendance_bulk(user_ids, timestamp, tx=None):
+        """
+        Record a detection for many users in one statement
+        First detection of the day inserts the entry time; later detections
+        advance exit_time and recompute total_hours
+        Returns: list of {id, user_id, inserted, total_hours}
+        """
+        # Sorted so concurrent batches lock rows in the same order
+        user_ids = sorted(set(int(user_id) for user_id in user_ids))
+        if not user_ids:
+            return []
+
+        results = (tx or db).fetch_all(Attendance._DETECTION_UPSERT, {
+            'date': timestamp.date(), 'ts': timestamp, 'user_ids': user_ids
+        })
+        return Attendance._convert_decimals_list(results)
+
+    @staticmethod
+    def record_detection(user_id, timestamp=None, tx=None):
+        """
+        Record one detection of a user with a single atomic upsert
+        Returns: {id, user_id, inserted, total_hours, type: 'entry'|'exit'}
+        """
+        timestamp = timestamp or datetime.now()
+        record = (tx or db).fetch_one(Attendance._DETECTION_UPSERT, {
+            'date': timestamp.date(), 'ts': timestamp, 'user_ids': [int(user_id)]
+        })
+        if record:
+            record = Attendance._convert_decimals(record)
+            record['type'] = 'entry' if record['inserted'] else 'exit'
+        return record
+
+    @staticmethod
+    def mark_attendance(user_id, timestamp=None, tx=None):
+        """
+        Record a detection of one user (entry on the first detection of the
+        day, exit time on later ones)
+        Returns: (success, message)
+        """
+        record = Attendance.record_detection(user_id, timestamp, tx=tx)
+        if not record:
+            return False, "Attendance was not recorded"
+        if record['inserted']:
+            return True, "Entry time recorded"
+        return True, "Exit time updated"
+
+    @staticmethod
+    def update_attendance(attendance_id, data, tx=None):
         """Update attendance record"""
         fields = []
         values = []
@@ -136,10 +252,10 @@ class Attendance:
 
         values.append(attendance_id)
         query = f"UPDATE attendance SET {', '.join(fields)} WHERE id = %s"
-        db.execute(query, tuple(values))
+        (tx or db).execute(query, tuple(values))
 
     @staticmethod
-    def get_attendance_by_id(attendance_id):
+    def get_attendance_by_id(attendance_id, tx=None):
         """Get attendance record by ID"""
         query = """
             SELECT a.*, u.full_name, u.employee_id
@@ -147,10 +263,10 @@ class Attendance:
             JOIN users u ON a.user_id = u.id
             WHERE a.id = %s
         """
-        return Attendance._convert_decimals(db.fetch_one(query, (attendance_id,)))
+        return Attendance._convert_decimals((tx or db).fetch_one(query, (attendance_id,)))
 
     @staticmethod
-    def get_user_attendance(user_id, start_date=None, end_date=None, month=None, year=None):
+    def get_user_attendance(user_id, start_date=None, end_date=None, month=None, year=None, tx=None):
         """Get attendance records for a user"""
         query = """
             SELECT a.*, u.full_name, u.employee_id
@@ -168,16 +284,16 @@ class Attendance:
             params.extend([month, year])
 
         query += " ORDER BY a.date DESC"
-        return Attendance._convert_decimals_list(db.fetch_all(query, tuple(params)))
+        return Attendance._convert_decimals_list((tx or db).fetch_all(query, tuple(params)))
 
     @staticmethod
-    def get_user_attendance_by_date(user_id, date):
+    def get_user_attendance_by_date(user_id, date, tx=None):
         """Get attendance record for a user on a specific date"""
         query = "SELECT * FROM attendance WHERE user_id = %s AND date = %s"
-        return Attendance._convert_decimals(db.fetch_one(query, (user_id, date)))
+        return Attendance._convert_decimals((tx or db).fetch_one(query, (user_id, date)))
 
     @staticmethod
-    def get_all_attendance(start_date=None, end_date=None, month=None, year=None):
+    def get_all_attendance(start_date=None, end_date=None, month=None, year=None, tx=None):
         """Get all attendance records"""
         query = """
             SELECT a.*, u.full_name, u.employee_id
@@ -195,11 +311,11 @@ class Attendance:
             params.extend([month, year])
 
         query += " ORDER BY a.date DESC, u.full_name"
-        results = db.fetch_all(query, tuple(params)) if params else db.fetch_all(query)
+        results = (tx or db).fetch_all(query, tuple(params)) if params else (tx or db).fetch_all(query)
         return Attendance._convert_decimals_list(results)
 
     @staticmethod
-    def get_attendance_by_date(date):
+    def get_attendance_by_date(date, tx=None):
         """Get all attendance records for a specific date"""
         query = """
             SELECT a.*, u.full_name, u.employee_id
@@ -208,16 +324,16 @@ class Attendance:
             WHERE a.date = %s
             ORDER BY u.full_name
         """
-        return Attendance._convert_decimals_list(db.fetch_all(query, (date,)))
+        return Attendance._convert_decimals_list((tx or db).fetch_all(query, (date,)))
 
     @staticmethod
-    def delete_attendance(attendance_id):
+    def delete_attendance(attendance_id, tx=None):
         """Delete attendance record"""
         query = "DELETE FROM attendance WHERE id = %s"
-        db.execute(query, (attendance_id,))
+        (tx or db).execute(query, (attendance_id,))
 
     @staticmethod
-    def get_attendance_summary(user_id, month, year):
+    def get_attendance_summary(user_id, month, year, tx=None):
         """Get attendance summary for a user for a specific month"""
         query = """
             SELECT
@@ -232,7 +348,7 @@ class Attendance:
             AND EXTRACT(MONTH FROM date) = %s
             AND EXTRACT(YEAR FROM date) = %s
         """
-        result = db.fetch_one(query, (user_id, month, year))
+        result = (tx or db).fetch_one(query, (user_id, month, year))
         if result:
             # Convert Decimal to float for avg_hours
             result['avg_hours'] = float(result['avg_hours']) if result['avg_hours'] else 0.0
@@ -252,18 +368,43 @@ class RecognitionLog:
     """Recognition log model for database operations"""
 
     @staticmethod
-    def log_recognition(user_id=None, confidence=0, status='success', photo_path=None):
+    def log_recognition(user_id=None, confidence=0, status='success', photo_path=None, tx=None):
         """Log a face recognition attempt"""
         query = """
             INSERT INTO recognition_logs (user_id, confidence, status, photo_path)
             VALUES (%s, %s, %s, %s)
             RETURNING id
         """
-        result = db.execute(query, (user_id, confidence, status, photo_path))
+        result = (tx or db).execute(query, (user_id, confidence, status, photo_path))
         return result
 
     @staticmethod
-    def get_logs(user_id=None, start_date=None, end_date=None, status=None, limit=100):
+    def log_recognitions(entries, tx=None):
+        """
+        Log many recognition attempts in one statement
+        Args:
+            entries: list of dicts with user_id, confidence, status
+                (photo_path and timestamp optional; timestamp defaults to now)
+        """
+        if not entries:
+            return 0
+
+        query = """
+            INSERT INTO recognition_logs (user_id, confidence, status, photo_path, timestamp)
+            SELECT user_id, confidence, status, photo_path, COALESCE(logged_at, NOW())
+            FROM unnest(%s::int[], %s::float8[], %s::text[], %s::text[], %s::timestamp[])
+                AS entry(user_id, confidence, status, photo_path, logged_at)
+        """
+        return (tx or db).execute(query, (
+            [entry.get('user_id') for entry in entries],
+            [entry.get('confidence', 0) for entry in entries],
+            [entry.get('status', 'success') for entry in entries],
+            [entry.get('photo_path') for entry in entries],
+            [entry.get('timestamp') for entry in entries]
+        ))
+
+    @staticmethod
+    def get_logs(user_id=None, start_date=None, end_date=None, status=None, limit=100, tx=None):
         """Get recognition logs with filters"""
         query = """
             SELECT rl.*, u.full_name, u.employee_id
@@ -288,31 +429,31 @@ class RecognitionLog:
         query += " ORDER BY rl.timestamp DESC LIMIT %s"
         params.append(limit)
 
-        return db.fetch_all(query, tuple(params))
+        return (tx or db).fetch_all(query, tuple(params))
 
 
 class AttendanceReport:
     """Attendance report model for database operations"""
 
     @staticmethod
-    def create_report(generated_by, month, year, report_path):
+    def create_report(generated_by, month, year, report_path, tx=None):
         """Create attendance report record"""
         query = """
             INSERT INTO attendance_reports (generated_by, month, year, report_path)
             VALUES (%s, %s, %s, %s)
             RETURNING id
         """
-        result = db.execute(query, (generated_by, month, year, report_path))
+        result = (tx or db).execute(query, (generated_by, month, year, report_path))
         return result
 
     @staticmethod
-    def get_report(report_id):
+    def get_report(report_id, tx=None):
         """Get report by ID"""
         query = "SELECT * FROM attendance_reports WHERE id = %s"
-        return db.fetch_one(query, (report_id,))
+        return (tx or db).fetch_one(query, (report_id,))
 
     @staticmethod
-    def get_all_reports(limit=50):
+    def get_all_reports(limit=50, tx=None):
         """Get all reports"""
         query = """
             SELECT ar.*, u.full_name as generated_by_name
@@ -321,10 +462,10 @@ class AttendanceReport:
             ORDER BY ar.created_at DESC
             LIMIT %s
         """
-        return db.fetch_all(query, (limit,))
+        return (tx or db).fetch_all(query, (limit,))
 
     @staticmethod
-    def delete_report(report_id):
+    def delete_report(report_id, tx=None):
         """Delete report"""
         query = "DELETE FROM attendance_reports WHERE id = %s"
-        db.execute(query, (report_id,))
+        (tx or db).execute(query, (report_id,))
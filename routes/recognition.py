@@ -1,15 +1,18 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
-import cv2
-import numpy as np
-from services.face_recognition_service import FaceRecognitionService
+from concurrent.futures import TimeoutError
+from services.face_recognition_service import get_face_service
+from services.recognition_pool import get_recognition_pool, RecognitionPoolBusy
+from config.recognition_config import RecognitionConfig
 from models import Attendance, RecognitionLog
+from services.recognition_log_writer import get_log_writer
+from utils.stage_timer import StageTimer
 import base64
 
 recognition_bp = Blueprint('recognition', __name__)
 
-face_service = FaceRecognitionService()
+face_service = get_face_service()
 
 def get_current_user():
     """Helper function to get user ID and role from JWT"""
@@ -20,6 +23,41 @@ def get_current_user():
         'role': claims.get('role', 'user')
     }
 
+def get_request_image_bytes():
+    """Get the encoded image from multipart 'image' or JSON base64 'image', or None"""
+    if 'image' in request.files:
+        return request.files['image'].read()
+    if request.is_json and 'image' in request.get_json():
+        data = request.get_json()
+        return base64.b64decode(data['image'].split(',')[-1])
+    return None
+
+def identify_image_bytes(image_bytes):
+    """
+    Identify the first face in an encoded image
+    Decoding, detection and encoding run on the recognition worker pool;
+    matching runs here against the shared gallery
+    """
+    timer = StageTimer()
+
+    with timer.stage('pool'):
+        encoded = get_recognition_pool().encode_image(image_bytes)
+
+    if encoded['encoding'] is None:
+        result = {'success': False, 'message': encoded['message']}
+    else:
+        with timer.stage('match'):
+            result = face_service.match_encodings([encoded['encoding']])[0]
+
+    result['timings'] = {**encoded['timings'], **timer.as_dict()}
+    return result
+
+def pool_error_response(error):
+    """Response for requests the recognition worker pool could not serve in time"""
+    if isinstance(error, RecognitionPoolBusy):
+        return jsonify({'success': False, 'error': 'Recognition service busy, try again'}), 503
+    return jsonify({'success': False, 'error': 'Recognition timed out'}), 504
+
 @recognition_bp.route('/identify', methods=['POST'])
 def identify_face():
     """
@@ -32,42 +70,33 @@ def identify_face():
         employee_id: str,
         attendance_type: 'entry'|'exit'|'ignored',
         timestamp: str,
-        confidence: float
+        confidence: float,
+        timings: {decode, detect, encode, pool, match} in ms
     }
     """
     try:
-        # Reload model if not loaded
-        if len(face_service.known_face_encodings) == 0:
-            face_service.load_model()
+        # Pick up gallery changes from other workers (reloads in the background)
+        face_service.check_for_updates()
 
         # Get image from request
-        if 'image' in request.files:
-            file = request.files['image']
-            image_bytes = file.read()
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        elif request.is_json and 'image' in request.get_json():
-            # Base64 encoded image
-            data = request.get_json()
-            image_data = base64.b64decode(data['image'].split(',')[-1])
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        else:
+        image_bytes = get_request_image_bytes()
+        if image_bytes is None:
             return jsonify({'error': 'No image provided'}), 400
 
         # Perform face recognition
-        result = face_service.identify_face(image)
+        result = identify_image_bytes(image_bytes)
 
         if not result['success']:
-            # Log failed recognition
-            RecognitionLog.log_recognition(
+            # Log failed recognition (written in the background)
+            get_log_writer().log(
                 user_id=None,
                 confidence=0,
                 status='failed'
             )
             return jsonify({
                 'success': False,
-                'message': result.get('message', 'Face not recognized')
+                'message': result.get('message', 'Face not recognized'),
+                'timings': result['timings']
             }), 200
 
         user_id = result['user_id']
@@ -75,8 +104,8 @@ def identify_face():
         full_name = result['full_name']
         employee_id = result['employee_id']
 
-        # Log successful recognition
-        RecognitionLog.log_recognition(
+        # Log successful recognition (written in the background)
+        get_log_writer().log(
             user_id=user_id,
             confidence=confidence,
             status='success'
@@ -93,9 +122,93 @@ def identify_face():
             'attendance_type': attendance_result['type'],
             'timestamp': datetime.now().isoformat(),
             'confidence': confidence,
-            'message': attendance_result['message']
+            'message': attendance_result['message'],
+            'timings': result['timings']
         }), 200
 
+    except (RecognitionPoolBusy, TimeoutError) as e:
+        return pool_error_response(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@recognition_bp.route('/identify/batch', methods=['POST'])
+def identify_faces_batch():
+    """
+    Identify users from many captured images and mark attendance in bulk
+    Body: {images: [base64_encoded_image, ...]} or multipart/form-data with multiple 'images' files
+    Returns: {
+        results: [{index, success, user_id, full_name, employee_id,
+                   attendance_type, confidence, message}, ...] in request order,
+        timestamp: str
+    }
+    """
+    try:
+        # Pick up gallery changes from other workers (reloads in the background)
+        face_service.check_for_updates()
+
+        # Get images from request
+        if 'images' in request.files:
+            images = [file.read() for file in request.files.getlist('images')]
+        elif request.is_json and 'images' in request.get_json():
+            data = request.get_json()
+            images = [base64.b64decode(image.split(',')[-1]) for image in data['images']]
+        else:
+            return jsonify({'error': 'No images provided'}), 400
+
+        if len(images) == 0:
+            return jsonify({'error': 'No images provided'}), 400
+
+        if len(images) > RecognitionConfig.MAX_BATCH_IMAGES:
+            return jsonify({'error': f'At most {RecognitionConfig.MAX_BATCH_IMAGES} images per batch'}), 400
+
+        # Decode, detect and encode in the worker pool
+        encoded = get_recognition_pool().encode_images(images)
+
+        # Match every probe against the gallery in one vectorized search
+        probe_indices = [i for i, item in enumerate(encoded) if item['encoding'] is not None]
+        matches = face_service.match_encodings([encoded[i]['encoding'] for i in probe_indices])
+
+        results = [{
+            'index': i,
+            'success': False,
+            'message': item['message']
+        } for i, item in enumerate(encoded)]
+        for i, match in zip(probe_indices, matches):
+            results[i].update(match)
+
+        # Mark attendance for every recognized user in one statement
+        now = datetime.now()
+        recognized = [result for result in results if result['success']]
+        attendance = {
+            row['user_id']: row
+            for row in Attendance.mark_attendance_bulk([result['user_id'] for result in recognized], now)
+        }
+
+        get_log_writer().log_many([{
+            'user_id': result.get('user_id'),
+            'confidence': result.get('confidence', 0),
+            'status': 'success' if result['success'] else 'failed',
+            'timestamp': now
+        } for result in results])
+
+        for result in recognized:
+            row = attendance.get(result['user_id'])
+            if row is None:
+                continue
+            result['attendance_type'] = 'entry' if row['inserted'] else 'exit'
+            result['attendance_id'] = row['id']
+            result['message'] = 'Entry time recorded' if row['inserted'] else 'Exit time updated'
+
+        return jsonify({
+            'results': results,
+            'timestamp': now.isoformat()
+        }), 200
+
+    except (RecognitionPoolBusy, TimeoutError) as e:
+        return pool_error_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -108,52 +221,23 @@ def mark_user_attendance(user_id):
     - First detection of the day: entry time
     - Last detection of the day: exit time (updates existing record)
     - Middle detections: ignored
+    One atomic upsert, so concurrent kiosks cannot race
     """
-    today = datetime.now().date()
-    current_time = datetime.now()
-
-    # Check if attendance record exists for today
-    existing_record = Attendance.get_user_attendance_by_date(user_id, today)
+    record = Attendance.record_detection(user_id, datetime.now())
 
-    if not existing_record:
-        # First detection of the day - mark entry
-        attendance_id = Attendance.create_attendance(
-            user_id=user_id,
-            date=today,
-            entry_time=current_time,
-            status='present'
-        )
+    if record['type'] == 'entry':
         return {
             'type': 'entry',
             'message': 'Entry time recorded',
-            'attendance_id': attendance_id
+            'attendance_id': record['id']
         }
-    else:
-        # Update exit time (will be updated with each subsequent detection)
-        # This ensures the last detection becomes the exit time
-        Attendance.update_attendance(
-            existing_record['id'],
-            {'exit_time': current_time}
-        )
-
-        # Calculate total hours
-        entry_time = existing_record['entry_time']
-        if isinstance(entry_time, str):
-            entry_time = datetime.fromisoformat(entry_time)
-
-        total_hours = (current_time - entry_time).total_seconds() / 3600
-
-        Attendance.update_attendance(
-            existing_record['id'],
-            {'total_hours': round(total_hours, 2)}
-        )
 
-        return {
-            'type': 'exit',
-            'message': 'Exit time updated',
-            'attendance_id': existing_record['id'],
-            'total_hours': round(total_hours, 2)
-        }
+    return {
+        'type': 'exit',
+        'message': 'Exit time updated',
+        'attendance_id': record['id'],
+        'total_hours': record['total_hours']
+    }
 
 @recognition_bp.route('/logs', methods=['GET'])
 @jwt_required()
@@ -177,6 +261,20 @@ def get_recognition_logs():
 
     return jsonify({'logs': logs}), 200
 
+@recognition_bp.route('/pool', methods=['GET'])
+@jwt_required()
+def get_pool_stats():
+    """
+    Get recognition worker pool statistics (admin only)
+    Returns: {workers, max_queue, submitted, completed, rejected, timed_out, in_flight}
+    """
+    current_user = get_current_user()
+
+    if current_user['role'] != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    return jsonify(get_recognition_pool().get_stats()), 200
+
 @recognition_bp.route('/test', methods=['POST'])
 @jwt_required()
 def test_recognition():
@@ -191,29 +289,21 @@ def test_recognition():
         return jsonify({'error': 'Admin access required'}), 403
 
     try:
-        # Reload model if not loaded
-        if len(face_service.known_face_encodings) == 0:
-            face_service.load_model()
+        # Pick up gallery changes from other workers (reloads in the background)
+        face_service.check_for_updates()
 
         # Get image from request
-        if 'image' in request.files:
-            file = request.files['image']
-            image_bytes = file.read()
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        elif request.is_json and 'image' in request.get_json():
-            data = request.get_json()
-            image_data = base64.b64decode(data['image'].split(',')[-1])
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        else:
+        image_bytes = get_request_image_bytes()
+        if image_bytes is None:
             return jsonify({'error': 'No image provided'}), 400
 
         # Perform face recognition
-        result = face_service.identify_face(image)
+        result = identify_image_bytes(image_bytes)
 
         return jsonify(result), 200
 
+    except (RecognitionPoolBusy, TimeoutError) as e:
+        return pool_error_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -6,7 +6,7 @@ import os
 import psycopg2
 from database import db
 from models import User
-from services.face_recognition_service import FaceRecognitionService
+from services.face_recognition_service import get_face_service
 
 users_bp = Blueprint('users', __name__)
 
@@ -148,6 +148,10 @@ def update_user(user_id):
 
     User.update_user(user_id, data)
 
+    # Keep the recognition gallery in step with name, employee ID or status changes
+    if any(field in data for field in ('full_name', 'employee_id', 'is_active')):
+        get_face_service().refresh_user(user_id)
+
     return jsonify({'message': 'User updated successfully'}), 200
 
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
@@ -163,6 +167,9 @@ def delete_user(user_id):
 
     User.deactivate_user(user_id)
 
+    # Stop recognizing the user right away
+    get_face_service().remove_user(user_id)
+
     return jsonify({'message': 'User deactivated successfully'}), 200
 
 @users_bp.route('/<int:user_id>/photos', methods=['POST'])
@@ -185,7 +192,7 @@ def upload_user_photos(user_id):
         return jsonify({'error': 'User not found'}), 404
 
     # Save photos and extract facial encodings
-    face_service = FaceRecognitionService()
+    face_service = get_face_service()
     saved_photos = []
     encodings = []
 
@@ -212,8 +219,16 @@ def upload_user_photos(user_id):
     # Save encodings to database
     User.save_facial_encodings(user_id, encodings, saved_photos)
 
-    # Retrain the model
-    face_service.retrain_model()
+    # Deactivated users keep their photos but stay out of the recognition gallery
+    if not user['is_active']:
+        return jsonify({
+            'message': f'Successfully uploaded {len(saved_photos)} photos; user is inactive and was not added to recognition',
+            'photos_count': len(saved_photos)
+        }), 200
+
+    # Patch this user into the gallery; other workers replay the change
+    if not face_service.add_user_encodings(user_id, user['full_name'], user['employee_id'], encodings):
+        return jsonify({'error': 'Photos saved but the recognition model could not be updated'}), 500
 
     return jsonify({
         'message': f'Successfully uploaded {len(saved_photos)} photos and trained model',
@@ -0,0 +1,83 @@
+"""
+Facial Encoding Migration
+Rewrites facial_encodings rows stored as pickled numpy arrays into the
+fixed-width float32 format of utils/encoding_codec.py, so the gallery can be
+bulk-loaded with one binary COPY. Rows already converted are skipped, so the
+script is safe to re-run.
+
+Usage:
+    python scripts/migrate_encodings.py
+    python scripts/migrate_encodings.py --batch-size 500 --dry-run
+    python scripts/migrate_encodings.py --retrain
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db
+from utils.encoding_codec import MAGIC, decode_encoding, encode_encoding
+
+
+def fetch_legacy_rows(after_id, batch_size):
+    """Next batch of rows whose encoding is not yet in the binary format"""
+    query = """
+        SELECT id, encoding FROM facial_encodings
+        WHERE id > %s AND substring(encoding from 1 for 4) <> %s
+        ORDER BY id
+        LIMIT %s
+    """
+    return db.fetch_all(query, (after_id, MAGIC, batch_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert pickled facial encodings to float32 records')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--dry-run', action='store_true', help='Decode rows without writing them back')
+    parser.add_argument('--retrain', action='store_true',
+                        help='Rebuild the gallery cache from the database afterwards')
+    args = parser.parse_args()
+
+    # One multi-row UPDATE per batch
+    update_query = """
+        UPDATE facial_encodings AS fe SET encoding = v.encoding
+        FROM (VALUES %s) AS v(id, encoding)
+        WHERE fe.id = v.id
+    """
+    converted = failed = 0
+    after_id = 0
+
+    while True:
+        rows = fetch_legacy_rows(after_id, args.batch_size)
+        if not rows:
+            break
+        after_id = rows[-1]['id']
+
+        updates = []
+        for row in rows:
+            try:
+                encoding = decode_encoding(row['encoding'])
+                updates.append((row['id'], encode_encoding(encoding)))
+            except Exception as e:
+                failed += 1
+                print(f"Skipping encoding {row['id']}: {str(e)}")
+
+        if updates and not args.dry_run:
+            db.execute_values(update_query, updates, page_size=args.batch_size)
+        converted += len(updates)
+        print(f"Converted {converted} encodings...")
+
+    print(f"Done: {converted} converted, {failed} failed{' (dry run)' if args.dry_run else ''}")
+    if args.retrain and not args.dry_run:
+        # Imported here: loading the service pulls in dlib and OpenCV
+        from services.face_recognition_service import get_face_service
+        if not get_face_service().retrain_model():
+            sys.exit(1)
+    elif converted and not args.dry_run:
+        print("Run this script again with --retrain to rebuild the gallery cache from the new rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Adaptive Frame Sampler
+Chooses how often a camera's frames are sent to recognition (every Nth frame)
+and how far they are downscaled for detection, from measured end-to-end frame
+latency and camera frame rate. When latency goes over the target, or frames
+are dropped because inference cannot keep up, the sampler backs off (larger
+interval first, then smaller detection scale); when there is plenty of
+headroom it restores detail and then samples more often, but only while the
+camera fps divided by the smaller interval, times the measured per-frame
+processing time, still fits the inference capacity. Every change is printed
+so it can be audited.
+"""
+
+import threading
+import time
+import numpy as np
+from config.camera_config import CameraConfig
+
+
+class AdaptiveSampler:
+    """
+    Args:
+        target_latency_ms: wanted 90th-percentile latency from capture to result
+        interval / scale: starting sampling interval and detection resize scale
+        min_interval / max_interval: bounds of the sampling interval (frames)
+        min_scale / max_scale: bounds of the detection resize scale
+        adjust_every: seconds between adjustments
+        capacity: frames that can be processed at once (inference workers)
+        name: label used in the log lines
+    """
+
+    def __init__(self, target_latency_ms=300, interval=5, scale=0.5, min_interval=1, max_interval=15,
+                 min_scale=0.25, max_scale=0.5, adjust_every=2.0, min_samples=5, capacity=1, name='camera'):
+        self.target_latency_ms = target_latency_ms
+        self.capacity = max(capacity, 1)
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.min_scale = min_scale
+        self.max_scale = max(max_scale, min_scale)
+        self.interval = int(min(max(interval, self.min_interval), self.max_interval))
+        self.scale = float(min(max(scale, self.min_scale), self.max_scale))
+        self.adjust_every = adjust_every
+        self.min_samples = min_samples
+        self.name = name
+
+        # record() runs on inference threads, adjust() on the capture thread
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._since_sample = 0
+        self._frames = 0
+        self._dropped = 0
+        self._last_adjust = time.monotonic()
+        self.adjustments = 0
+
+    @property
+    def adaptive(self):
+        return self.min_interval < self.max_interval or self.min_scale < self.max_scale
+
+    def should_sample(self):
+        """Called once per captured frame; True if this frame should be processed"""
+        self._frames += 1
+        self._since_sample += 1
+        if self._since_sample >= self.interval:
+            self._since_sample = 0
+            return True
+        return False
+
+    def record(self, latency_ms):
+        """Record the capture-to-result latency of a processed frame"""
+        with self._lock:
+            self._latencies.append(latency_ms)
+
+    def record_drop(self, count=1):
+        """Record sampled frames that were overwritten before inference took them"""
+        with self._lock:
+            self._dropped += count
+
+    def adjust(self, now=None):
+        """
+        Re-evaluate interval and scale once every `adjust_every` seconds
+        Returns: True if either changed
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._last_adjust
+        if not self.adaptive or elapsed < self.adjust_every:
+            return False
+
+        with self._lock:
+            if len(self._latencies) < self.min_samples and not self._dropped:
+                return False
+            latencies, self._latencies = self._latencies, []
+            dropped, self._dropped = self._dropped, 0
+
+        latency = float(np.percentile(latencies, 90)) if latencies else 0.0
+        fps = self._frames / elapsed
+        # Share of the inference capacity used if one more frame in every
+        # interval were sampled: frames/s sent x seconds per frame
+        service_s = float(np.median(latencies)) / 1000 if latencies else 0.0
+        projected_load = fps / max(self.interval - 1, 1) * service_s / self.capacity
+        old_interval, old_scale = self.interval, self.scale
+
+        if latency > self.target_latency_ms or dropped:
+            # Overloaded: sample less often (multiplicative), then detect on smaller frames
+            if self.interval < self.max_interval:
+                self.interval = min(self.max_interval, self.interval + max(1, self.interval // 2))
+            elif self.scale > self.min_scale:
+                self.scale = max(self.min_scale, round(self.scale * 0.75, 3))
+        elif latency < self.target_latency_ms * 0.5:
+            # Headroom: restore detection detail first, then sample more often (additive)
+            if self.scale < self.max_scale:
+                self.scale = min(self.max_scale, round(self.scale / 0.75, 3))
+            elif self.interval > self.min_interval and projected_load < 0.8:
+                self.interval -= 1
+
+        changed = (self.interval, self.scale) != (old_interval, old_scale)
+        if changed:
+            self.adjustments += 1
+            print(f"[sampler {self.name}] interval {old_interval} -> {self.interval}, "
+                  f"scale {old_scale:g} -> {self.scale:g} "
+                  f"(p90 latency {latency:.0f}ms, target {self.target_latency_ms:.0f}ms, "
+                  f"{fps:.1f} fps, projected load {projected_load:.2f}, {dropped} dropped)")
+
+        self._frames = 0
+        self._last_adjust = now
+        return changed
+
+    def get_stats(self):
+        return {
+            'interval': self.interval,
+            'scale': self.scale,
+            'target_latency_ms': self.target_latency_ms,
+            'adjustments': self.adjustments
+        }
+
+
+def create_adaptive_sampler(name='camera'):
+    """
+    Create a sampler from CameraConfig
+    With ADAPTIVE_SAMPLING off the bounds collapse to PROCESS_EVERY_N_FRAMES
+    and RESIZE_SCALE, so the sampling stays fixed
+    """
+    interval = CameraConfig.PROCESS_EVERY_N_FRAMES
+    scale = CameraConfig.RESIZE_SCALE
+    if not CameraConfig.ADAPTIVE_SAMPLING:
+        return AdaptiveSampler(interval=interval, scale=scale, min_interval=interval, max_interval=interval,
+                               min_scale=scale, max_scale=scale, name=name)
+
+    return AdaptiveSampler(
+        target_latency_ms=CameraConfig.TARGET_LATENCY_MS,
+        interval=interval,
+        scale=scale,
+        min_interval=CameraConfig.MIN_FRAME_INTERVAL,
+        max_interval=CameraConfig.MAX_FRAME_INTERVAL,
+        min_scale=CameraConfig.MIN_RESIZE_SCALE,
+        max_scale=max(CameraConfig.RESIZE_SCALE, CameraConfig.MIN_RESIZE_SCALE),
+        capacity=CameraConfig.INFERENCE_WORKERS,
+        name=name
+    )
@@ -0,0 +1,122 @@
+"""
+Face detector backends
+Every detector takes an RGB image and returns face_recognition-style boxes:
+    [(top, right, bottom, left), ...]
+"""
+
+import os
+import threading
+import cv2
+import numpy as np
+import face_recognition
+from config.camera_config import CameraConfig
+
+
+class DlibFaceDetector:
+    """dlib detector through face_recognition ('hog' on CPU, 'cnn' for GPU)"""
+
+    def __init__(self, model='hog', upsample=1):
+        self.name = model
+        self.model = model
+        self.upsample = upsample
+
+    def detect(self, rgb_image):
+        return face_recognition.face_locations(rgb_image, number_of_times_to_upsample=self.upsample,
+                                               model=self.model)
+
+
+class DnnFaceDetector:
+    """
+    OpenCV DNN ResNet-10 SSD face detector
+    Uses the network definition in models/dnn/deploy.prototxt plus the matching
+    res10_300x300_ssd_iter_140000 Caffe weights
+    A cv2.dnn.Net holds its input between setInput() and forward() (which
+    releases the GIL), so every thread gets its own network
+    """
+
+    name = 'dnn'
+
+    def __init__(self, prototxt_path, weights_path, confidence_threshold=0.5, input_size=300):
+        self.prototxt_path = prototxt_path
+        self.weights_path = weights_path
+        self.confidence_threshold = confidence_threshold
+        self.input_size = input_size
+        self._local = threading.local()
+        self.net  # Load (and validate) the weights in the creating thread
+
+    @property
+    def net(self):
+        """Network of the calling thread, loaded on its first detection"""
+        net = getattr(self._local, 'net', None)
+        if net is None:
+            net = self._local.net = cv2.dnn.readNetFromCaffe(self.prototxt_path, self.weights_path)
+        return net
+
+    def detect(self, rgb_image):
+        height, width = rgb_image.shape[:2]
+
+        # The network was trained on BGR input with these channel means
+        blob = cv2.dnn.blobFromImage(rgb_image, 1.0, (self.input_size, self.input_size),
+                                     (104.0, 177.0, 123.0), swapRB=True, crop=False)
+        net = self.net
+        net.setInput(blob)
+        detections = net.forward()[0, 0]
+
+        # Each detection row: [image_id, label, confidence, x1, y1, x2, y2] (relative coords)
+        detections = detections[detections[:, 2] >= self.confidence_threshold]
+        boxes = detections[:, 3:7] * np.array([width, height, width, height])
+
+        face_locations = []
+        for x1, y1, x2, y2 in boxes:
+            left, top = max(0, int(x1)), max(0, int(y1))
+            right, bottom = min(width - 1, int(x2)), min(height - 1, int(y2))
+            if right > left and bottom > top:
+                face_locations.append((top, right, bottom, left))
+
+        return face_locations
+
+
+def detect_faces(detector, rgb_image, max_side=0):
+    """
+    Detect faces on a copy downscaled so its longest side is at most `max_side`
+    and map the boxes back to full-resolution coordinates, so detection cost does
+    not grow with upload size while encodings can still use full-resolution crops
+    """
+    height, width = rgb_image.shape[:2]
+    longest = max(height, width)
+    if not max_side or longest <= max_side:
+        return detector.detect(rgb_image)
+
+    scale = max_side / longest
+    small_image = cv2.resize(rgb_image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                             interpolation=cv2.INTER_AREA)
+
+    return [(
+        max(0, int(top / scale)),
+        min(width, int(right / scale)),
+        min(height, int(bottom / scale)),
+        max(0, int(left / scale))
+    ) for (top, right, bottom, left) in detector.detect(small_image)]
+
+
+def create_face_detector(model=None):
+    """
+    Create the detector selected by CameraConfig.FACE_DETECTION_MODEL
+    Falls back to HOG when the DNN weights file is not available
+    """
+    model = model or CameraConfig.FACE_DETECTION_MODEL
+
+    if model == 'dnn':
+        if os.path.exists(CameraConfig.DNN_PROTOTXT_PATH) and os.path.exists(CameraConfig.DNN_WEIGHTS_PATH):
+            return DnnFaceDetector(
+                CameraConfig.DNN_PROTOTXT_PATH,
+                CameraConfig.DNN_WEIGHTS_PATH,
+                confidence_threshold=CameraConfig.DNN_CONFIDENCE_THRESHOLD
+            )
+        print(f"DNN face detector weights not found ({CameraConfig.DNN_WEIGHTS_PATH}), using HOG")
+        return DlibFaceDetector('hog')
+
+    if model in ('hog', 'cnn'):
+        return DlibFaceDetector(model)
+
+    raise ValueError(f"Unknown face detection model: {model}")
@@ -0,0 +1,234 @@
+import numpy as np
+
+
+class FaceGallery:
+    """
+    Known face encodings stored as one contiguous float32 matrix
+    Rows are preallocated in blocks so enrollment appends in place, and the
+    squared norm of every row is kept alongside the matrix so a probe is
+    matched with a single matrix-vector product:
+        ||g - p||^2 = ||g||^2 - 2 * g.p + ||p||^2
+    Removed users are tombstoned (label -1, infinite norm) so existing row
+    numbers never change; compacted() drops tombstones into a new gallery.
+    Readers take `size` before the arrays, and rows below `size` are never
+    rewritten except to tombstone them, so appends are safe under concurrent search.
+    """
+
+    def __init__(self, dim=128, capacity=1024):
+        self.dim = dim
+        self.size = 0
+        self.removed = 0  # Tombstoned rows
+        self.users = {}  # user_id -> {'full_name', 'employee_id'}
+        self.backing = None  # Shared memory / mapped file the arrays live in, if any
+        self._matrix = np.empty((capacity, dim), dtype=np.float32)
+        self._sq_norms = np.empty(capacity, dtype=np.float32)
+        self._labels = np.empty(capacity, dtype=np.int32)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def encodings(self):
+        """View of the populated rows of the gallery matrix"""
+        return self._matrix[:self.size]
+
+    @property
+    def sq_norms(self):
+        """Squared L2 norm of every populated row"""
+        return self._sq_norms[:self.size]
+
+    @property
+    def labels(self):
+        """User ID of every populated row"""
+        return self._labels[:self.size]
+
+    def clear(self):
+        """Drop all encodings but keep the allocated buffers"""
+        self.size = 0
+        self.removed = 0
+        self.users = {}
+
+    def _reserve(self, rows):
+        """
+        Grow the buffers (doubling) so that `rows` more encodings fit
+        Read-only (shared) buffers are always copied into private memory first
+        """
+        needed = self.size + rows
+        capacity = self._matrix.shape[0]
+        if needed <= capacity and self._matrix.flags.writeable:
+            return
+
+        while capacity < needed:
+            capacity = max(capacity * 2, 1)
+
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        labels = np.empty(capacity, dtype=np.int32)
+        matrix[:self.size] = self._matrix[:self.size]
+        sq_norms[:self.size] = self._sq_norms[:self.size]
+        labels[:self.size] = self._labels[:self.size]
+        self._matrix, self._sq_norms, self._labels = matrix, sq_norms, labels
+
+    def add(self, user_id, full_name, employee_id, encodings):
+        """
+        Append encodings for a single user
+        Args:
+            encodings: array-like of shape (n, dim) or a single (dim,) vector
+        Returns: number of rows added
+        """
+        rows = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        count = rows.shape[0]
+        if count == 0:
+            return 0
+
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        self._matrix[start:end] = rows
+        self._sq_norms[start:end] = np.einsum('ij,ij->i', rows, rows)
+        self._labels[start:end] = user_id
+
+        self.users[int(user_id)] = {
+            'full_name': full_name,
+            'employee_id': employee_id
+        }
+        # Publish the new rows last
+        self.size = end
+        return count
+
+    def _tombstone(self, rows):
+        if len(rows) == 0:
+            return
+        self._reserve(0)
+        self._sq_norms[rows] = np.inf
+        self._labels[rows] = -1
+        self.removed += len(rows)
+
+    def remove_user(self, user_id):
+        """
+        Tombstone every row of a user
+        Returns: array of the removed row numbers
+        """
+        user_id = int(user_id)
+        self.users.pop(user_id, None)
+        rows = np.flatnonzero(self.labels == user_id)
+        self._tombstone(rows)
+        return rows
+
+    def replace_user(self, user_id, full_name, employee_id, encodings):
+        """
+        Swap in a new set of encodings for a user
+        The new rows are appended before the old ones are tombstoned, so the
+        user stays recognizable throughout
+        Returns: array of the removed row numbers
+        """
+        old_rows = np.flatnonzero(self.labels == int(user_id))
+        self.add(user_id, full_name, employee_id, encodings)
+        self._tombstone(old_rows)
+        return old_rows
+
+    def copy(self):
+        """
+        Private, writable copy with the same row numbers, so changes can be
+        applied to it while the original is still being searched
+        """
+        gallery = FaceGallery(dim=self.dim, capacity=max(self.size, 1))
+        gallery._matrix[:self.size] = self.encodings
+        gallery._sq_norms[:self.size] = self.sq_norms
+        gallery._labels[:self.size] = self.labels
+        gallery.users = dict(self.users)
+        gallery.size = self.size
+        gallery.removed = self.removed
+        return gallery
+
+    def compacted(self):
+        """New gallery without tombstoned rows (row numbers change)"""
+        return self.take(np.flatnonzero(self.labels >= 0))
+
+    def take(self, rows):
+        """New gallery holding the given rows in that order (row numbers change)"""
+        rows = np.asarray(rows)
+        gallery = FaceGallery(dim=self.dim, capacity=max(len(rows), 1))
+        gallery._matrix[:len(rows)] = self.encodings[rows]
+        gallery._sq_norms[:len(rows)] = self.sq_norms[rows]
+        gallery._labels[:len(rows)] = self.labels[rows]
+        gallery.users = dict(self.users)
+        gallery.size = len(rows)
+        gallery.removed = int(np.count_nonzero(gallery.labels < 0))
+        return gallery
+
+    def metadata(self, index):
+        """Get user information for a gallery row"""
+        user_id = int(self._labels[index])
+        user = self.users.get(user_id, {})
+        return {
+            'user_id': user_id,
+            'full_name': user.get('full_name'),
+            'employee_id': user.get('employee_id')
+        }
+
+    def distances(self, probes, start=0, end=None, squared=False):
+        """
+        Euclidean distance from each probe to every gallery row in [start, end)
+        Tombstoned rows come out as infinity
+        Args:
+            probes: array of shape (dim,) or (n, dim)
+            squared: return squared distances (skips the square root)
+        Returns: array of shape (rows,) for one probe or (n, rows) for many
+        """
+        end = self.size if end is None else end
+        probes = np.asarray(probes, dtype=np.float32)
+        single = probes.ndim == 1
+        probes = probes.reshape(-1, self.dim)
+
+        # One GEMV/GEMM call against the contiguous matrix
+        sq = probes @ self._matrix[start:end].T
+        sq *= -2.0
+        sq += self._sq_norms[start:end]
+        sq += np.einsum('ij,ij->i', probes, probes)[:, None]
+        np.maximum(sq, 0.0, out=sq)
+        distances = sq if squared else np.sqrt(sq, out=sq)
+
+        return distances[0] if single else distances
+
+    @classmethod
+    def from_records(cls, encodings, metadata):
+        """Build a gallery from parallel lists of encodings and metadata dicts"""
+        encodings = np.asarray(encodings, dtype=np.float32)
+        dim = encodings.shape[1] if encodings.ndim == 2 else 128
+        gallery = cls(dim=dim, capacity=max(len(metadata), 1))
+
+        # Group consecutive rows of the same user into one add() call
+        start = 0
+        for i in range(1, len(metadata) + 1):
+            if i == len(metadata) or metadata[i]['user_id'] != metadata[start]['user_id']:
+                info = metadata[start]
+                gallery.add(info['user_id'], info['full_name'], info['employee_id'],
+                            encodings[start:i])
+                start = i
+
+        return gallery
+
+    @classmethod
+    def from_arrays(cls, encodings, sq_norms, labels, users, removed=None):
+        """
+        Wrap existing arrays (e.g. read-only shared memory views) without copying
+        The buffers are exactly full, so the first add() copies them into
+        private, writable memory
+        Args:
+            removed: number of tombstoned rows, if known (otherwise counted)
+        """
+        gallery = cls.__new__(cls)
+        gallery.dim = encodings.shape[1]
+        gallery.size = encodings.shape[0]
+        gallery.removed = int(np.count_nonzero(labels < 0)) if removed is None else removed
+        gallery.users = users
+        gallery.backing = None
+        gallery._matrix = encodings
+        gallery._sq_norms = sq_norms
+        gallery._labels = labels
+        return gallery
+
+    def to_records(self):
+        """Export live rows as (encodings matrix, list of metadata dicts)"""
+        live = np.flatnonzero(self.labels >= 0)
+        return self.encodings[live], [self.metadata(i) for i in live]
@@ -0,0 +1,295 @@
+"""
+Gallery search indexes for FaceRecognitionService
+All indexes share the same interface:
+    build(gallery, layout=None) - index a FaceGallery (layout: see layout())
+    search(probes, k=1)       - return (distances, row_indices), each (n_probes, k)
+    remove_rows(rows)         - forget tombstoned gallery rows
+    needs_rebuild()           - True once incremental updates have degraded the index
+    clone(gallery)            - same index over a copy of its gallery (row numbers unchanged)
+    layout()                  - (row order, centroids, offsets) to publish with a
+                                shared gallery, or None if the index has none
+Rows appended to the gallery after build() are always searched.
+"""
+
+import copy
+import numpy as np
+
+
+def _top_k(distances, k):
+    """Select the k smallest distances per row, sorted ascending"""
+    k = min(k, distances.shape[1])
+    if k == 1:
+        indices = np.argmin(distances, axis=1)[:, None]
+    else:
+        indices = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(distances, indices, axis=1), axis=1)
+        indices = np.take_along_axis(indices, order, axis=1)
+    return np.take_along_axis(distances, indices, axis=1), indices
+
+
+class ExactIndex:
+    """Brute-force scan over every gallery row"""
+
+    name = 'exact'
+
+    def __init__(self):
+        self.gallery = None
+
+    def build(self, gallery, layout=None):
+        self.gallery = gallery
+        return self
+
+    def layout(self):
+        return None
+
+    def search(self, probes, k=1):
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, self.gallery.dim)
+        if len(self.gallery) == 0:
+            empty = np.empty((probes.shape[0], 0))
+            return empty, empty.astype(np.int64)
+        return _top_k(self.gallery.distances(probes), k)
+
+    def remove_rows(self, rows):
+        # Tombstoned rows already score infinity in the gallery itself
+        pass
+
+    def clone(self, gallery):
+        return ExactIndex().build(gallery)
+
+    def needs_rebuild(self):
+        return False
+
+
+class IVFIndex:
+    """
+    Inverted file index: k-means coarse clusters over the gallery
+    A probe is only compared against the rows of its `nprobe` nearest clusters.
+    Rows are stored cluster-by-cluster in a private contiguous copy so every
+    scanned cluster is a single matrix-vector product. A gallery whose rows
+    are already in that order (a published shared gallery) is built from its
+    layout and searched in place instead.
+    Galleries smaller than `min_size` fall back to an exact scan.
+    """
+
+    name = 'ivf'
+
+    def __init__(self, nlist=0, nprobe=8, min_size=20000, train_iters=10,
+                 train_points_per_list=40, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_size = min_size
+        self.train_iters = train_iters
+        self.train_points_per_list = train_points_per_list
+        self.seed = seed
+        self.gallery = None
+        self._exact = ExactIndex()
+        self._trained = False
+        self._indexed_size = 0
+
+    @staticmethod
+    def _assign(vectors, centroids, centroid_sq_norms, chunk=65536):
+        """Nearest centroid for every vector, computed in chunks"""
+        assignments = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], chunk):
+            block = vectors[start:start + chunk]
+            scores = block @ centroids.T
+            scores *= -2.0
+            scores += centroid_sq_norms
+            assignments[start:start + chunk] = np.argmin(scores, axis=1)
+        return assignments
+
+    def _train(self, vectors, nlist):
+        """Lloyd's k-means on a random sample of the gallery"""
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(vectors.shape[0], nlist * self.train_points_per_list)
+        sample = vectors[rng.choice(vectors.shape[0], sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.train_iters):
+            assignments = self._assign(sample, centroids, np.einsum('ij,ij->i', centroids, centroids))
+            counts = np.bincount(assignments, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        return centroids
+
+    def _cluster(self, gallery):
+        """Coarse clusters for the gallery: (centroids, row assignments)"""
+        vectors = gallery.encodings
+        nlist = self.nlist or int(np.sqrt(len(gallery)))
+        nlist = max(1, min(nlist, len(gallery)))
+        centroids = self._train(vectors, nlist)
+        centroid_sq_norms = np.einsum('ij,ij->i', centroids, centroids)
+        return centroids, self._assign(vectors, centroids, centroid_sq_norms)
+
+    def build(self, gallery, layout=None):
+        self.gallery = gallery
+        self._exact.build(gallery)
+        n = len(gallery)
+        self._indexed_size = n
+        if layout is not None:
+            return self._build_from_layout(layout)
+        self._trained = n >= max(self.min_size, 1)
+        if not self._trained:
+            return self
+
+        vectors = gallery.encodings
+        self._centroids, assignments = self._cluster(gallery)
+        if self._centroids.shape[0] == 0:
+            # Nothing live to cluster (every row tombstoned)
+            self._trained = False
+            return self
+        self._centroid_sq_norms = np.einsum('ij,ij->i', self._centroids, self._centroids)
+        nlist = self._centroids.shape[0]
+
+        # Lay rows out cluster by cluster
+        order = np.argsort(assignments, kind='stable')
+        self._row_ids = order
+        self._positions = np.empty_like(order)
+        self._positions[order] = np.arange(len(order))
+        self._vectors = np.ascontiguousarray(vectors[order])
+        self._sq_norms = gallery.sq_norms[order]
+        self._offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=nlist))))
+        return self
+
+    def _build_from_layout(self, layout):
+        """Use rows already stored cluster by cluster: no clustering, no copy"""
+        self._centroids, self._offsets = layout
+        self._centroid_sq_norms = np.einsum('ij,ij->i', self._centroids, self._centroids)
+        self._row_ids = np.arange(len(self.gallery))
+        self._positions = self._row_ids
+        self._vectors = self.gallery.encodings
+        self._sq_norms = self.gallery.sq_norms
+        self._trained = True
+        return self
+
+    def layout(self):
+        """
+        Cluster order of the gallery rows with the centroids and offsets, so a
+        gallery published as gallery.take(order) can be built without clustering
+        Returns: (order, centroids, offsets), or None if untrained or rows were appended
+        """
+        if not self._trained or len(self.gallery) != self._indexed_size:
+            return None
+        return self._row_ids, self._centroids, self._offsets
+
+    def remove_rows(self, rows):
+        """Tombstone gallery rows in the clustered copy"""
+        rows = np.asarray(rows)
+        rows = rows[rows < self._indexed_size]
+        if self._trained and len(rows):
+            self._sq_norms[self._positions[rows]] = np.inf
+
+    def clone(self, gallery):
+        """Share the trained clusters; only the tombstone-able norms are copied"""
+        clone = copy.copy(self)
+        clone.gallery = gallery
+        clone._exact = ExactIndex().build(gallery)
+        if self._trained:
+            clone._sq_norms = self._sq_norms.copy()
+        return clone
+
+    def needs_rebuild(self):
+        """Rebuild once appended rows or tombstones make up a large share of the gallery"""
+        size = len(self.gallery)
+        pending = size - self._indexed_size
+        if not self._trained:
+            return size >= max(self.min_size, 1)
+        return pending > max(1024, self._indexed_size // 10) or self.gallery.removed > size // 4
+
+    def search(self, probes, k=1, nprobe=None):
+        if not self._trained:
+            return self._exact.search(probes, k)
+
+        # Rows appended since build() are scanned exactly
+        size = self.gallery.size
+        pending = None
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, self.gallery.dim)
+        if size > self._indexed_size:
+            pending = self.gallery.distances(probes, self._indexed_size, size, squared=True)
+            pending_rows = np.arange(self._indexed_size, size)
+
+        nprobe = min(nprobe or self.nprobe, self._centroids.shape[0])
+
+        coarse = probes @ self._centroids.T
+        coarse *= -2.0
+        coarse += self._centroid_sq_norms
+        nearest_lists = np.argpartition(coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+        out_distances = np.full((probes.shape[0], k), np.inf)
+        out_indices = np.full((probes.shape[0], k), -1, dtype=np.int64)
+
+        for i, probe in enumerate(probes):
+            probe_sq = float(probe @ probe)
+            candidate_distances = []
+            candidate_rows = []
+            for list_id in nearest_lists[i]:
+                start, end = self._offsets[list_id], self._offsets[list_id + 1]
+                if start == end:
+                    continue
+                sq = self._vectors[start:end] @ probe
+                sq *= -2.0
+                sq += self._sq_norms[start:end]
+                sq += probe_sq
+                candidate_distances.append(sq)
+                candidate_rows.append(self._row_ids[start:end])
+
+            if pending is not None:
+                candidate_distances.append(pending[i])
+                candidate_rows.append(pending_rows)
+
+            if not candidate_distances:
+                continue
+
+            sq = np.concatenate(candidate_distances)[None, :]
+            best_sq, best = _top_k(sq, k)
+            found = best.shape[1]
+            out_distances[i, :found] = np.sqrt(np.maximum(best_sq[0], 0.0))
+            out_indices[i, :found] = np.concatenate(candidate_rows)[best[0]]
+
+        return out_distances, out_indices
+
+
+class CentroidIndex(IVFIndex):
+    """
+    Two-stage per-user matching
+    Every enrolled user is one cluster whose centroid is the mean of their
+    encodings. A probe is first compared against all user centroids to
+    shortlist the `shortlist` closest users, then re-ranked exactly against
+    only those users' encodings, so the reported distance (and therefore the
+    confidence_threshold check) is still the distance to a real encoding.
+    """
+
+    name = 'centroid'
+
+    def __init__(self, shortlist=10, min_size=0):
+        super().__init__(nprobe=shortlist, min_size=min_size)
+
+    def _cluster(self, gallery):
+        """
+        One cluster per live user; tombstoned rows (label -1) get the id one
+        past the last cluster, so they sort to the end and are never scanned
+        """
+        labels = gallery.labels
+        live = labels >= 0
+        user_ids, live_assignments = np.unique(labels[live], return_inverse=True)
+        assignments = np.full(len(labels), len(user_ids), dtype=np.int64)
+        assignments[live] = live_assignments
+        counts = np.bincount(live_assignments, minlength=len(user_ids))
+        centroids = np.zeros((len(user_ids), gallery.dim), dtype=np.float32)
+        np.add.at(centroids, live_assignments, gallery.encodings[live])
+        centroids /= counts[:, None]
+        return centroids, assignments
+
+
+def create_face_index(kind='exact', nlist=0, nprobe=8, min_size=20000, shortlist=10):
+    """Create a gallery index by name"""
+    if kind == 'exact':
+        return ExactIndex()
+    if kind == 'ivf':
+        return IVFIndex(nlist=nlist, nprobe=nprobe, min_size=min_size)
+    if kind == 'centroid':
+        return CentroidIndex(shortlist=shortlist)
+    raise ValueError(f"Unknown face index type: {kind}")
@@ -2,9 +2,21 @@ import cv2
 import numpy as np
 import pickle
 import os
+import threading
+import time
 import face_recognition
 from database import db
 from models import User
+from services.face_gallery import FaceGallery
+from services.face_index import create_face_index
+from services.face_detector import create_face_detector, detect_faces
+from services import shared_gallery
+from services.gallery_generation import GalleryGeneration
+from services.gallery_journal import GalleryJournal, new_journal_id
+from services import gallery_snapshot
+from config.recognition_config import RecognitionConfig
+from utils.stage_timer import StageTimer
+from utils.encoding_codec import decode_encoding, decode_copy_rows
 
 class FaceRecognitionService:
     """
@@ -13,13 +25,60 @@ class FaceRecognitionService:
     """
 
     def __init__(self):
-        self.known_face_encodings = []
-        self.known_face_metadata = []  # Store user_id, full_name, employee_id
+        self.index_params = RecognitionConfig.get_index_params()
+        self.index = create_face_index(**self.index_params).build(FaceGallery())
+        self.detector = create_face_detector()
+        self.detection_max_side = RecognitionConfig.DETECTION_MAX_SIDE  # 0 = detect at full size
         self.confidence_threshold = 0.6  # Distance threshold (lower = more strict)
-        self.model_path = 'models/face_encodings.pkl'
+        self.snapshot_path = RecognitionConfig.GALLERY_SNAPSHOT_PATH
+        self.verify_snapshot = RecognitionConfig.GALLERY_VERIFY_SNAPSHOT
+        self.legacy_model_path = 'models/face_encodings.pkl'  # Pre-snapshot pickle cache
+        self.gallery_backend = RecognitionConfig.GALLERY_BACKEND  # 'local' or 'shared'
+        self.shared_gallery_name = RecognitionConfig.GALLERY_SHM_NAME
+        self.gallery_lock_path = 'models/gallery.lock'
+
+        # Incremental per-user changes recorded since the cache was written
+        self.journal = GalleryJournal(os.path.join(self.snapshot_path, 'journal'))
+        self.journal_id = None
+        self.journal_offset = 0
+        # Past either limit the journal is folded into a new snapshot
+        self.journal_max_records = RecognitionConfig.GALLERY_JOURNAL_MAX_RECORDS
+        self.journal_max_bytes = RecognitionConfig.GALLERY_JOURNAL_MAX_BYTES
+        self._update_lock = threading.Lock()
+
+        # Cross-process hot reload: generation of the loaded gallery vs. the stamp file
+        self.generation_stamp = GalleryGeneration(RecognitionConfig.GALLERY_GENERATION_PATH)
+        self.generation = 0
+        self.check_interval = RecognitionConfig.GALLERY_CHECK_INTERVAL
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._reloading = False
+
         os.makedirs('models', exist_ok=True)
         self.load_model()
 
+    @property
+    def gallery(self):
+        """Gallery currently being searched (contiguous float32 encodings + user metadata)"""
+        return self.index.gallery
+
+    def _set_gallery(self, gallery, layout=None):
+        """
+        Index a new gallery and swap it in with a single assignment
+        Args:
+            layout: cluster layout published with a shared gallery (skips clustering)
+        """
+        self.index = create_face_index(**self.index_params).build(gallery, layout)
+
+    @property
+    def known_face_encodings(self):
+        """Known encodings as a (n, 128) float32 matrix view"""
+        return self.gallery.encodings
+
+    def _detect_faces(self, rgb_image):
+        """Detect faces with the configured detector and detection_max_side"""
+        return detect_faces(self.detector, rgb_image, self.detection_max_side)
+
     def extract_face_encoding(self, image_path):
         """
         Extract face encoding from an image using dlib's deep learning model
@@ -30,8 +89,8 @@ class FaceRecognitionService:
             image = face_recognition.load_image_file(image_path)
 
             # Find all face locations and encodings in the image
-            # model can be 'hog' (faster) or 'cnn' (more accurate, requires GPU)
-            face_locations = face_recognition.face_locations(image, model='hog')
+            # Detector backend is selected by CameraConfig.FACE_DETECTION_MODEL
+            face_locations = self._detect_faces(image)
 
             if len(face_locations) == 0:
                 print("No face detected in image")
@@ -51,68 +110,170 @@ class FaceRecognitionService:
             print(f"Error extracting face encoding: {str(e)}")
             return None
 
+    def _load_gallery_bulk(self):
+        """
+        Build the gallery from one binary COPY of all encodings
+        Returns: FaceGallery, or None if some rows are still in the legacy pickle format
+        """
+        # Both statements read one database snapshot, so an enrollment or
+        # deactivation in between cannot leave encodings without names
+        with db.transaction() as tx:
+            tx.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            copy_data = User.copy_all_facial_encodings(tx=tx)
+            enrolled = User.get_enrolled_users(tx=tx)
+
+        decoded = decode_copy_rows(copy_data)
+        if decoded is None:
+            return None
+
+        labels, encodings = decoded
+        users = {
+            row['id']: {'full_name': row['full_name'], 'employee_id': row['employee_id']}
+            for row in enrolled
+        }
+        sq_norms = np.einsum('ij,ij->i', encodings, encodings)
+        return FaceGallery.from_arrays(encodings, sq_norms, labels, users)
+
+    def _load_gallery_rows(self):
+        """Build the gallery row by row (handles legacy pickled encodings)"""
+        encodings_data = User.get_all_facial_encodings()
+        gallery = FaceGallery(capacity=max(len(encodings_data), 1))
+
+        for item in encodings_data:
+            encoding = decode_encoding(item['encoding'])
+            gallery.add(item['user_id'], item['full_name'], item['employee_id'], encoding)
+
+        return gallery
+
+    def _load_gallery_from_database(self):
+        """Build the gallery from every active user's encodings in the database"""
+        gallery = self._load_gallery_bulk()
+        if gallery is None:
+            print("Legacy pickled encodings found; run scripts/migrate_encodings.py for faster loads")
+            gallery = self._load_gallery_rows()
+        return gallery
+
     def retrain_model(self):
         """
         Reload all face encodings from database
         """
         try:
-            # Get all facial encodings from database
-            encodings_data = User.get_all_facial_encodings()
+            gallery = self._load_gallery_from_database()
 
-            if not encodings_data or len(encodings_data) == 0:
+            if len(gallery) == 0:
                 print("No facial encodings found for training")
                 return False
 
-            self.known_face_encodings = []
-            self.known_face_metadata = []
-
-            for item in encodings_data:
-                user_id = item['user_id']
-                encoding_bytes = item['encoding']
-
-                # Deserialize numpy array
-                encoding = pickle.loads(encoding_bytes)
+            self._set_gallery(gallery)
 
-                self.known_face_encodings.append(encoding)
-                self.known_face_metadata.append({
-                    'user_id': user_id,
-                    'full_name': item['full_name'],
-                    'employee_id': item['employee_id']
-                })
-
-            # Save to cache
-            self.save_model()
+            # Save to cache and announce the new generation to other workers
+            self._commit_gallery(gallery)
 
-            print(f"Model trained successfully with {len(self.known_face_encodings)} face encodings from {len(set(item['user_id'] for item in self.known_face_metadata))} users")
+            print(f"Model trained successfully with {len(gallery)} face encodings from {len(gallery.users)} users")
             return True
 
         except Exception as e:
             print(f"Error training model: {str(e)}")
             return False
 
-    def identify_face(self, image):
+    def _to_rgb(self, image):
+        """Convert a BGR numpy image or image path to an RGB array"""
+        # face_recognition uses RGB
+        if isinstance(image, np.ndarray):
+            return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return face_recognition.load_image_file(image)
+
+    def _match_encodings(self, index, encodings):
+        """
+        Match a batch of probe encodings against the gallery in one search
+        Returns: list of result dicts, one per encoding
+        """
+        gallery = index.gallery
+        distances, indices = index.search(np.asarray(encodings), k=1)
+
+        results = []
+        for row in range(len(encodings)):
+            if distances.shape[1] == 0 or indices[row, 0] < 0:
+                results.append({
+                    'success': False,
+                    'message': 'No known faces to compare against'
+                })
+                continue
+
+            best_match_index = indices[row, 0]
+            best_distance = distances[row, 0]
+
+            # Convert distance to confidence (0-1 scale, higher is better)
+            # face_distance returns euclidean distance, typical threshold is 0.6
+            confidence = 1 - best_distance
+
+            # Check if confidence meets threshold
+            if best_distance > self.confidence_threshold:
+                results.append({
+                    'success': False,
+                    'message': f'Face not recognized with sufficient confidence (distance: {best_distance:.2f}, threshold: {self.confidence_threshold})'
+                })
+                continue
+
+            # Get user information
+            user_info = gallery.metadata(best_match_index)
+
+            results.append({
+                'success': True,
+                'user_id': int(user_info['user_id']),
+                'full_name': user_info['full_name'],
+                'employee_id': user_info['employee_id'],
+                'confidence': float(confidence),
+                'distance': float(best_distance)
+            })
+
+        return results
+
+    def match_encodings(self, encodings):
+        """
+        Match precomputed probe encodings against the current gallery in one search
+        Returns: list of result dicts, one per encoding
+        """
+        index = self.index
+        if len(encodings) == 0:
+            return []
+        if len(index.gallery) == 0:
+            return [{
+                'success': False,
+                'message': 'Face recognition model not trained'
+            } for _ in encodings]
+        return self._match_encodings(index, encodings)
+
+    def identify_face(self, image, timer=None):
         """
         Identify a person from an image
         Args:
             image: numpy array (OpenCV image in BGR format) or path to image
+            timer: optional StageTimer that also holds earlier stages (e.g. decode)
         Returns:
-            dict: {success, user_id, full_name, employee_id, confidence, message}
+            dict: {success, user_id, full_name, employee_id, confidence, message, timings}
         """
+        timer = timer or StageTimer()
+        result = self._identify_face(image, timer)
+        result['timings'] = timer.as_dict()
+        return result
+
+    def _identify_face(self, image, timer):
+        """identify_face without the timing bookkeeping"""
         try:
-            if len(self.known_face_encodings) == 0:
+            index = self.index
+            if len(index.gallery) == 0:
                 return {
                     'success': False,
                     'message': 'Face recognition model not trained'
                 }
 
-            # Convert from BGR to RGB (face_recognition uses RGB)
-            if isinstance(image, np.ndarray):
-                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            else:
-                rgb_image = face_recognition.load_image_file(image)
+            with timer.stage('decode'):
+                rgb_image = self._to_rgb(image)
 
-            # Find all face locations and encodings
-            face_locations = face_recognition.face_locations(rgb_image, model='hog')
+            # Find all face locations
+            with timer.stage('detect'):
+                face_locations = self._detect_faces(rgb_image)
 
             if len(face_locations) == 0:
                 return {
@@ -120,7 +281,9 @@ class FaceRecognitionService:
                     'message': 'No face detected in image'
                 }
 
-            face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
+            # Only the first detected face is identified, so only it is encoded
+            with timer.stage('encode'):
+                face_encodings = face_recognition.face_encodings(rgb_image, face_locations[:1])
 
             if len(face_encodings) == 0:
                 return {
@@ -128,81 +291,413 @@ class FaceRecognitionService:
                     'message': 'Could not generate encoding for detected face'
                 }
 
-            # Use the first detected face
-            unknown_encoding = face_encodings[0]
+            with timer.stage('match'):
+                return self._match_encodings(index, face_encodings)[0]
 
-            # Compare with all known faces
-            face_distances = face_recognition.face_distance(self.known_face_encodings, unknown_encoding)
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Error during face recognition: {str(e)}'
+            }
 
-            if len(face_distances) == 0:
-                return {
-                    'success': False,
-                    'message': 'No known faces to compare against'
-                }
+    def identify_faces(self, image, face_locations=None, timer=None):
+        """
+        Identify every face in an image in a single pass
+        Args:
+            image: numpy array (OpenCV image in BGR format) or path to image
+            face_locations: optional list of (top, right, bottom, left) boxes in image
+                coordinates; when omitted faces are detected once on the image
+            timer: optional StageTimer collecting decode/detect/encode/match timings
+        Returns:
+            list of dicts, one per face box in face_locations order:
+            {success, location, user_id, full_name, employee_id, confidence, distance}
+            or {success: False, location, message}
+        """
+        timer = timer or StageTimer()
+        try:
+            index = self.index
+            with timer.stage('decode'):
+                rgb_image = self._to_rgb(image)
 
-            # Find the best match
-            best_match_index = np.argmin(face_distances)
-            best_distance = face_distances[best_match_index]
+            if face_locations is None:
+                with timer.stage('detect'):
+                    face_locations = self._detect_faces(rgb_image)
+            face_locations = [tuple(int(v) for v in location) for location in face_locations]
 
-            # Convert distance to confidence (0-1 scale, higher is better)
-            # face_distance returns euclidean distance, typical threshold is 0.6
-            confidence = 1 - best_distance
+            if len(face_locations) == 0:
+                return []
 
-            # Check if confidence meets threshold
-            if best_distance > self.confidence_threshold:
-                return {
+            if len(index.gallery) == 0:
+                results = [{
                     'success': False,
-                    'message': f'Face not recognized with sufficient confidence (distance: {best_distance:.2f}, threshold: {self.confidence_threshold})'
-                }
+                    'message': 'Face recognition model not trained'
+                } for _ in face_locations]
+            else:
+                # Encode all faces in one call, then match them as one batch
+                with timer.stage('encode'):
+                    face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
+                with timer.stage('match'):
+                    results = self._match_encodings(index, face_encodings)
 
-            # Get user information
-            user_info = self.known_face_metadata[best_match_index]
+            for location, result in zip(face_locations, results):
+                result['location'] = location
 
-            return {
-                'success': True,
-                'user_id': int(user_info['user_id']),
-                'full_name': user_info['full_name'],
-                'employee_id': user_info['employee_id'],
-                'confidence': float(confidence),
-                'distance': float(best_distance)
-            }
+            return results
 
         except Exception as e:
-            return {
+            return [{
                 'success': False,
+                'location': location,
                 'message': f'Error during face recognition: {str(e)}'
-            }
+            } for location in (face_locations or [])]
 
-    def save_model(self):
-        """Save the known face encodings to disk"""
+    def save_model(self, generation=None):
+        """
+        Write the known face encodings as a memory-mapped snapshot and start a
+        new change journal
+        Args:
+            generation: generation recorded in the snapshot header (default: the next one)
+        """
         try:
-            with open(self.model_path, 'wb') as f:
-                pickle.dump({
-                    'encodings': self.known_face_encodings,
-                    'metadata': self.known_face_metadata
-                }, f)
+            if generation is None:
+                generation = self.generation_stamp.read() + 1
+            journal_id = new_journal_id()
+            gallery_snapshot.write_snapshot(self.gallery, self.snapshot_path, generation, journal_id)
+            self.journal.reset(journal_id)
+            self.journal_id = journal_id
+            self.journal_offset = 0
             return True
         except Exception as e:
             print(f"Error saving model: {str(e)}")
             return False
 
+    def _read_model_file(self):
+        """
+        Map the gallery snapshot and replay its change journal
+        Returns: (gallery, journal_id, journal_offset), or (None, None, 0) if there is no cache
+        """
+        gallery, header = gallery_snapshot.load_snapshot(self.snapshot_path, verify=self.verify_snapshot)
+        if gallery is None:
+            return self._read_legacy_model_file()
+
+        journal_id = header['journal_id']
+        operations, offset = self.journal.read(journal_id)
+        if operations:
+            self._apply_operations(gallery, None, operations)
+            # Replaying copied the mapped arrays anyway; drop tombstones while at it
+            if gallery.removed > len(gallery) // 4:
+                gallery = gallery.compacted()
+        return gallery, journal_id, offset
+
+    def _read_legacy_model_file(self):
+        """Load a pickle cache written before snapshots existed (replaced on the next save)"""
+        if not os.path.exists(self.legacy_model_path):
+            return None, None, 0
+        with open(self.legacy_model_path, 'rb') as f:
+            data = pickle.load(f)
+        return FaceGallery.from_records(data['encodings'], data['metadata']), None, 0
+
+    @staticmethod
+    def _apply_operations(gallery, index, operations):
+        """Apply journal operations to a gallery, keeping its index in step if given"""
+        for operation in operations:
+            if operation[0] == 'add':
+                _, user_id, full_name, employee_id, encodings = operation
+                removed_rows = gallery.replace_user(user_id, full_name, employee_id, encodings)
+            else:
+                removed_rows = gallery.remove_user(operation[1])
+
+            if index is not None:
+                index.remove_rows(removed_rows)
+
+    def _patched(self, operations):
+        """
+        Apply operations to a copy of the live gallery and index (build, then
+        swap): searches running meanwhile keep seeing the old, consistent one
+        Returns: the patched index, to be assigned to self.index
+        """
+        gallery = self.gallery.copy()
+        index = self.index.clone(gallery)
+        self._apply_operations(gallery, index, operations)
+        return index
+
+    def _commit_gallery(self, gallery):
+        """
+        Write the gallery to the disk cache (and shared memory), then bump the
+        generation so other workers reload it
+        """
+        with shared_gallery.gallery_lock(self.gallery_lock_path):
+            self._write_gallery(gallery)
+
+    def _write_gallery(self, gallery):
+        """Body of _commit_gallery, for callers already holding the gallery lock"""
+        generation = self.generation_stamp.read() + 1
+        self.save_model(generation)
+        if self.gallery_backend == 'shared':
+            self._publish_and_attach(gallery, generation)
+        self.generation = self.generation_stamp.bump()
+
+    def _has_cache(self):
+        """True if a gallery snapshot or legacy pickle cache exists on disk"""
+        return (gallery_snapshot.read_header(self.snapshot_path) is not None
+                or os.path.exists(self.legacy_model_path))
+
+    def _publish_and_attach(self, gallery, generation=0):
+        """
+        Publish a gallery to shared memory and switch to the shared read-only copy
+        The index is clustered once here and the rows published in cluster
+        order with its layout, so attaching workers need not cluster or copy
+        """
+        if gallery.removed:
+            gallery = gallery.compacted()
+        index = create_face_index(**self.index_params).build(gallery)
+        published, layout = gallery, index.layout()
+        if layout is not None:
+            order, centroids, offsets = layout
+            published, layout = gallery.take(order), (centroids, offsets)
+
+        shared_gallery.publish_gallery(published, self.shared_gallery_name, generation, layout)
+        shared, _, shared_layout = shared_gallery.attach_gallery(self.shared_gallery_name)
+        if shared is not None:
+            self._set_gallery(shared, shared_layout)
+        else:
+            self.index = index
+
+    def _load_shared_model(self):
+        """
+        Attach to the gallery published in shared memory
+        The first worker to find none loads the disk cache and publishes it
+        """
+        with shared_gallery.gallery_lock(self.gallery_lock_path):
+            if self._attach_current():
+                print(f"Attached to shared gallery with {len(self.gallery)} encodings")
+                return True
+
+            return self._republish_from_disk()
+
+    def _attach_current(self):
+        """
+        Attach to the shared gallery if it holds the current generation
+        A segment left from before a restart, or from before a change made with
+        the local backend, is stale and must be republished from disk
+        Returns: False if no segment or a stale one is published
+        """
+        gallery, generation, layout = shared_gallery.attach_gallery(self.shared_gallery_name)
+        if gallery is None:
+            return False
+        if generation != self.generation_stamp.read():
+            print(f"Shared gallery generation {generation} is stale, republishing")
+            return False
+        self._set_gallery(gallery, layout)
+        return True
+
+    def _republish_from_disk(self):
+        """Load the disk cache and publish it as the current generation (caller holds the gallery lock)"""
+        gallery, self.journal_id, self.journal_offset = self._read_model_file()
+        if gallery is None:
+            print("No saved model found")
+            return False
+
+        self._publish_and_attach(gallery, self.generation_stamp.read())
+        print(f"Model loaded and published to shared memory with {len(gallery)} encodings")
+        return True
+
     def load_model(self):
-        """Load the known face encodings from disk"""
+        """Load the known face encodings from disk (or shared memory)"""
         try:
-            if os.path.exists(self.model_path):
-                with open(self.model_path, 'rb') as f:
-                    data = pickle.load(f)
-                    self.known_face_encodings = data['encodings']
-                    self.known_face_metadata = data['metadata']
-                print(f"Model loaded successfully with {len(self.known_face_encodings)} encodings")
-                return True
+            # Read the stamp first: a bump during the load triggers another reload
+            generation = self.generation_stamp.read()
+
+            if self.gallery_backend == 'shared':
+                loaded = self._load_shared_model()
             else:
-                print("No saved model found")
-                return False
+                gallery, journal_id, journal_offset = self._read_model_file()
+                loaded = gallery is not None
+                if loaded:
+                    self._set_gallery(gallery)
+                    self.journal_id, self.journal_offset = journal_id, journal_offset
+                    print(f"Model loaded successfully with {len(self.gallery)} encodings")
+                else:
+                    print("No saved model found")
+
+            if loaded:
+                self.generation = generation
+            elif not self._has_cache():
+                # Fresh deploy or wiped models/: build the cache from the database
+                return self.retrain_model()
+            return loaded
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             return False
 
+    def _apply_journal_tail(self):
+        """
+        Apply only the journal records written since this process last read it
+        Returns: False when the journal was restarted by a full retrain
+        """
+        if self.journal_id is None:
+            return False
+        operations, offset = self.journal.read(self.journal_id, self.journal_offset)
+        if operations is None:
+            return False
+        if operations:
+            self.index = self._patched(operations)
+        self.journal_offset = offset
+        return True
+
+    def _catch_up(self):
+        """Bring this process up to the latest generation before changing the gallery"""
+        generation = self.generation_stamp.read()
+        if generation <= self.generation:
+            return
+
+        if self.gallery_backend == 'shared':
+            if not self._attach_current():
+                self._republish_from_disk()
+        elif not self._apply_journal_tail():
+            gallery, self.journal_id, self.journal_offset = self._read_model_file()
+            if gallery is not None:
+                self._set_gallery(gallery)
+        self.generation = generation
+
+    def _maybe_rebuild(self):
+        """Compact tombstones and rebuild the index once incremental updates have piled up"""
+        gallery = self.gallery
+        if gallery.removed > len(gallery) // 4:
+            self._set_gallery(gallery.compacted())
+        elif self.index.needs_rebuild():
+            self._set_gallery(gallery)
+
+    def _journal_full(self):
+        """True once the journal should be folded into a new snapshot"""
+        if self.journal_offset >= self.journal_max_bytes:
+            return True
+        operations, _ = self.journal.read(self.journal_id)
+        return operations is not None and len(operations) >= self.journal_max_records
+
+    def _apply_update(self, operation):
+        """
+        Apply one per-user change here, append it to the on-disk journal and
+        bump the generation so other workers replay just that record
+        Once the journal is full the gallery is written as a new snapshot
+        instead, so workers map it again rather than replaying a growing journal
+        into private memory
+        """
+        try:
+            with self._update_lock, shared_gallery.gallery_lock(self.gallery_lock_path):
+                self._catch_up()
+
+                if self.journal_id is None and not self._has_cache():
+                    # Nothing to patch: an empty gallery saved as the base would
+                    # leave out everyone already enrolled. The change is already
+                    # in the database, so a full load includes it
+                    gallery = self._load_gallery_from_database()
+                    self._set_gallery(gallery)
+                    self._write_gallery(gallery)
+                    print(f"Gallery built from the database with {len(gallery)} encodings")
+                    return True
+
+                # A journal needs a base snapshot to apply to
+                if self.journal_id is None:
+                    self.save_model()
+
+                self.index = self._patched([operation])
+                generation = self.generation_stamp.read() + 1
+
+                if self._journal_full():
+                    # Snapshot drops tombstones and starts an empty journal;
+                    # switch to the mapped copy of it
+                    if not self.save_model(generation):
+                        raise RuntimeError("could not write gallery snapshot")
+                    gallery, self.journal_id, self.journal_offset = self._read_model_file()
+                    self._set_gallery(gallery)
+                    print(f"Gallery journal folded into a new snapshot with {len(gallery)} encodings")
+                else:
+                    self.journal.append(operation)
+                    self.journal_offset = os.path.getsize(self.journal.path)
+                    self._maybe_rebuild()
+
+                if self.gallery_backend == 'shared':
+                    self._publish_and_attach(self.gallery, generation)
+                self.generation = self.generation_stamp.bump()
+            return True
+
+        except Exception as e:
+            print(f"Error updating gallery: {str(e)}")
+            return False
+
+    def add_user_encodings(self, user_id, full_name, employee_id, encodings):
+        """
+        Replace one user's encodings in the gallery without a full retrain
+        Args:
+            encodings: list of 128-d encodings (replaces any the user already had)
+        """
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.gallery.dim)
+        return self._apply_update(('add', int(user_id), full_name, employee_id, encodings))
+
+    def remove_user(self, user_id):
+        """Drop a user from the gallery without a full retrain (e.g. on deactivation)"""
+        return self._apply_update(('remove', int(user_id)))
+
+    def refresh_user(self, user_id):
+        """Re-read one user's encodings and status from the database and patch the gallery"""
+        user = User.find_by_id(user_id)
+        if not user or not user['is_active']:
+            return self.remove_user(user_id)
+
+        rows = User.get_facial_encodings(user_id)
+        if not rows:
+            return self.remove_user(user_id)
+
+        encodings = [decode_encoding(row['encoding']) for row in rows]
+        return self.add_user_encodings(user_id, user['full_name'], user['employee_id'], encodings)
+
+    def check_for_updates(self):
+        """
+        Cheap per-request check for a newer gallery generation
+        A newer generation (or a still-empty gallery) is reloaded in a background
+        thread; requests keep using the current gallery meanwhile
+        Returns: True if a reload was started
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        if self.generation_stamp.read() <= self.generation and len(self.gallery) > 0:
+            return False
+
+        with self._reload_lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+
+        threading.Thread(target=self._reload_in_background, daemon=True).start()
+        return True
+
+    def _reload_in_background(self):
+        """
+        Apply just the new journal records when possible (to a copy that is
+        then swapped in), otherwise load the whole cache and swap it in
+        """
+        try:
+            with self._update_lock:
+                generation = self.generation_stamp.read()
+                patched = False
+                if self.gallery_backend != 'shared':
+                    with shared_gallery.gallery_lock(self.gallery_lock_path):
+                        patched = self._apply_journal_tail()
+                        if patched:
+                            self.generation = generation
+                            self._maybe_rebuild()
+                if not patched and not self.load_model():
+                    return
+            print(f"Gallery generation {self.generation} loaded")
+        except Exception as e:
+            print(f"Error reloading gallery: {str(e)}")
+        finally:
+            self._reloading = False
+
     def detect_and_draw_faces(self, image):
         """
         Detect faces and draw bounding boxes (for testing/debugging)
@@ -215,7 +710,7 @@ class FaceRecognitionService:
             rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
             # Find all face locations
-            face_locations = face_recognition.face_locations(rgb_image, model='hog')
+            face_locations = self._detect_faces(rgb_image)
 
             # Draw rectangles around faces
             for (top, right, bottom, left) in face_locations:
@@ -227,3 +722,16 @@ class FaceRecognitionService:
         except Exception as e:
             print(f"Error detecting faces: {str(e)}")
             return image
+
+
+_face_service = None
+_face_service_lock = threading.Lock()
+
+
+def get_face_service():
+    """Get the long-lived FaceRecognitionService shared by this process"""
+    global _face_service
+    with _face_service_lock:
+        if _face_service is None:
+            _face_service = FaceRecognitionService()
+        return _face_service
@@ -0,0 +1,168 @@
+"""
+Face Tracker
+Lightweight IoU tracker for the entrance camera. Detected boxes are matched to
+the tracks of the previous frame, so a person standing in view is encoded and
+identified once when their track starts and their identity is carried forward
+on later frames; tracks are only re-verified every few frames.
+"""
+
+import itertools
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Intersection-over-union of every pair of (top, right, bottom, left) boxes
+    Returns: array of shape (len(boxes_a), len(boxes_b))
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+
+    area_a = (a[:, 1] - a[:, 3]) * (a[:, 2] - a[:, 0])
+    area_b = (b[:, 1] - b[:, 3]) * (b[:, 2] - b[:, 0])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-6), 0.0)
+
+
+class Track:
+    """One face followed across frames"""
+
+    def __init__(self, track_id, location):
+        self.track_id = track_id
+        self.location = location
+        self.result = None  # Last identification result dict
+        self.age = 0  # Frames since the track started
+        self.missed = 0  # Consecutive frames without a matching detection
+        self.since_identified = 0  # Frames since the last identification
+        self.in_flight = False  # Identification running on another worker
+        self.epoch = 0  # Bumped when the track is re-matched after a gap
+
+    @property
+    def identified(self):
+        return self.result is not None and self.result.get('success', False)
+
+
+class FaceTracker:
+    """
+    Greedy IoU matcher with track ageing
+    Args:
+        iou_threshold: minimum IoU for a detection to continue a track
+        max_missed: frames a track survives without a detection
+        reverify_every: frames between re-identifications of a known face
+        retry_unknown_every: frames between attempts on an unrecognized face
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=5, reverify_every=30, retry_unknown_every=5):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.reverify_every = reverify_every
+        self.retry_unknown_every = retry_unknown_every
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+        # Counters
+        self.tracks_started = 0
+        self.identifications = 0
+        self.carried_forward = 0
+        self.reidentified_after_gap = 0
+
+    def update(self, face_locations):
+        """
+        Match this frame's detections to existing tracks
+        Returns: list of tracks, one per face location (in the same order)
+        """
+        face_locations = [tuple(int(v) for v in location) for location in face_locations]
+        matched = [None] * len(face_locations)
+        unmatched_tracks = set(range(len(self.tracks)))
+
+        if self.tracks and face_locations:
+            overlaps = iou_matrix([track.location for track in self.tracks], face_locations)
+            # Best pairs first; each track and detection is used at most once
+            for flat in np.argsort(overlaps, axis=None)[::-1]:
+                t, d = np.unravel_index(flat, overlaps.shape)
+                if overlaps[t, d] < self.iou_threshold:
+                    break
+                if t in unmatched_tracks and matched[d] is None:
+                    matched[d] = self.tracks[t]
+                    unmatched_tracks.discard(t)
+
+        for track in self.tracks:
+            track.age += 1
+            track.since_identified += 1
+
+        # Age out tracks nobody matched
+        for t in unmatched_tracks:
+            self.tracks[t].missed += 1
+        self.tracks = [
+            track for i, track in enumerate(self.tracks)
+            if i not in unmatched_tracks or track.missed <= self.max_missed
+        ]
+
+        for d, location in enumerate(face_locations):
+            track = matched[d]
+            if track is None:
+                track = Track(next(self._ids), location)
+                self.tracks.append(track)
+                self.tracks_started += 1
+            elif track.missed > 0:
+                # After a gap this may be someone else stepping into the same
+                # spot: forget the identity and identify the face again
+                track.result = None
+                track.in_flight = False
+                track.epoch += 1
+                self.reidentified_after_gap += 1
+            track.location = location
+            track.missed = 0
+            matched[d] = track
+
+        return matched
+
+    def needs_identification(self, track):
+        """True for new tracks and for tracks due for re-verification"""
+        if track.in_flight:
+            return False
+        if track.result is None:
+            return True
+        interval = self.reverify_every if track.identified else self.retry_unknown_every
+        return track.since_identified >= interval
+
+    def select_for_identification(self, tracks):
+        """
+        Positions of the tracks that must be encoded this frame; the rest
+        carry their previous identity forward. Selected tracks are marked in
+        flight until assign() so concurrent workers do not encode them twice.
+        """
+        selected = [i for i, track in enumerate(tracks) if self.needs_identification(track)]
+        for i in selected:
+            tracks[i].in_flight = True
+        self.carried_forward += len(tracks) - len(selected)
+        return selected
+
+    def assign(self, track, result, epoch=None):
+        """
+        Store a fresh identification result on a track
+        Args:
+            epoch: track.epoch when the face was selected; a result for an
+                earlier epoch (the track was re-matched after a gap) is discarded
+        """
+        if epoch is not None and epoch != track.epoch:
+            return
+        track.result = result
+        track.in_flight = False
+        track.since_identified = 0
+        self.identifications += 1
+
+    def get_stats(self):
+        """Tracker counters"""
+        return {
+            'active_tracks': len(self.tracks),
+            'tracks_started': self.tracks_started,
+            'identifications': self.identifications,
+            'carried_forward': self.carried_forward,
+            'reidentified_after_gap': self.reidentified_after_gap
+        }
@@ -0,0 +1,49 @@
+"""
+Gallery generation counter
+A small stamp file holding an integer that is bumped every time the gallery
+cache is rewritten. Workers compare it against the generation they loaded to
+find out, with one stat() call, that they need to reload.
+"""
+
+import os
+
+
+class GalleryGeneration:
+    """File-stamp generation counter shared by every process on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = None  # (inode, mtime_ns, size) of the last read
+        self._value = 0
+
+    def read(self):
+        """Current generation; the file is only re-read when its stat changes"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            try:
+                with open(self.path) as f:
+                    self._value = int(f.read().strip() or 0)
+            except (FileNotFoundError, ValueError):
+                return self._value
+            self._stamp = stamp
+
+        return self._value
+
+    def bump(self):
+        """
+        Increment the generation and return the new value
+        Written to a temp file and renamed so readers never see a partial value;
+        callers serialize bumps with the gallery lock
+        """
+        self._stamp = None
+        generation = self.read() + 1
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(str(generation))
+        os.replace(temp_path, self.path)
+        return generation
@@ -0,0 +1,68 @@
+"""
+Append-only journal of incremental gallery changes
+The gallery cache on disk is a full base snapshot plus this journal of
+per-user operations recorded since the snapshot was written:
+    ('add', user_id, full_name, employee_id, float32 encodings)
+    ('remove', user_id)
+Enrolling or deactivating a user appends one record instead of rewriting the
+whole cache, and other workers replay only the records past the offset they
+have already applied. The first record holds the journal id, which must match
+the id stored in the base snapshot; a full retrain starts a new journal.
+"""
+
+import os
+import pickle
+import uuid
+
+
+def new_journal_id():
+    return uuid.uuid4().hex
+
+
+class GalleryJournal:
+    """Pickle-framed operation log next to the gallery cache"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def reset(self, journal_id):
+        """Start an empty journal for a freshly written base snapshot"""
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'journal_id': journal_id}, f)
+        os.replace(temp_path, self.path)
+
+    def append(self, operation):
+        """Append one operation and flush it to disk"""
+        with open(self.path, 'ab') as f:
+            pickle.dump(operation, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, journal_id, offset=0):
+        """
+        Read operations written after `offset`
+        Returns: (operations, new offset), or (None, 0) when the journal is
+        missing or belongs to a different base snapshot
+        """
+        if not os.path.exists(self.path):
+            return None, 0
+
+        operations = []
+        with open(self.path, 'rb') as f:
+            header = pickle.load(f)
+            if header.get('journal_id') != journal_id:
+                return None, 0
+
+            if offset:
+                f.seek(offset)
+            while True:
+                position = f.tell()
+                try:
+                    operations.append(pickle.load(f))
+                except (EOFError, pickle.UnpicklingError):
+                    # End of journal, or a record still being written by another process
+                    f.seek(position)
+                    break
+
+            return operations, f.tell()
@@ -0,0 +1,153 @@
+"""
+Memory-mapped gallery snapshot
+The gallery cache on disk is a directory of plain .npy arrays that are opened
+with np.load(mmap_mode='r'), so loading only maps the files and startup cost
+does not grow with the gallery; pages are read on first use and shared
+through the page cache by every process on the host.
+
+    models/gallery/
+        CURRENT                 header (JSON): snapshot dir, generation,
+                                journal id, count, dim, checksum
+        <snapshot id>/
+            encodings.npy       (count, dim) float32
+            sq_norms.npy        (count,) float32
+            labels.npy          (count,) int32 user_id per row
+            user_ids.npy        (users,) int32
+            users.json          {"full_name": [...], "employee_id": [...]}
+                                parallel to user_ids.npy
+
+A snapshot is written into a temp directory, renamed into place and only
+then published by atomically replacing CURRENT, so readers never see a
+half-written snapshot. Older snapshot directories are removed afterwards;
+processes still mapping them keep their pages until they let go.
+"""
+
+import json
+import os
+import shutil
+import uuid
+import zlib
+import numpy as np
+from services.face_gallery import FaceGallery
+
+VERSION = 1
+HEADER_NAME = 'CURRENT'
+ARRAYS = ('encodings', 'sq_norms', 'labels', 'user_ids')
+
+
+def _checksum(arrays, users_bytes):
+    """CRC32 over every array's bytes and the name tables"""
+    crc = 0
+    for array in arrays:
+        crc = zlib.crc32(np.ascontiguousarray(array).data, crc)
+    return zlib.crc32(users_bytes, crc)
+
+
+def read_header(path):
+    """Header of the current snapshot, or None if there is none"""
+    try:
+        with open(os.path.join(path, HEADER_NAME)) as f:
+            header = json.load(f)
+    except FileNotFoundError:
+        return None
+    return header if header.get('version') == VERSION else None
+
+
+def write_snapshot(gallery, path, generation=0, journal_id=None):
+    """
+    Write the live rows of a gallery as a new snapshot and publish it
+    Returns: the header written to CURRENT
+    """
+    os.makedirs(path, exist_ok=True)
+    encodings, metadata = gallery.to_records()
+    labels = np.array([info['user_id'] for info in metadata], dtype=np.int32)
+    user_ids = np.array(sorted(gallery.users), dtype=np.int32)
+    users_bytes = json.dumps({
+        'full_name': [gallery.users[int(user_id)]['full_name'] for user_id in user_ids],
+        'employee_id': [gallery.users[int(user_id)]['employee_id'] for user_id in user_ids]
+    }).encode('utf-8')
+    arrays = {
+        'encodings': np.ascontiguousarray(encodings, dtype=np.float32),
+        'sq_norms': np.einsum('ij,ij->i', encodings, encodings).astype(np.float32),
+        'labels': labels,
+        'user_ids': user_ids
+    }
+
+    snapshot = uuid.uuid4().hex
+    temp_dir = os.path.join(path, f".{snapshot}.tmp")
+    os.makedirs(temp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(temp_dir, f"{name}.npy"), array)
+    with open(os.path.join(temp_dir, 'users.json'), 'wb') as f:
+        f.write(users_bytes)
+    os.rename(temp_dir, os.path.join(path, snapshot))
+
+    header = {
+        'version': VERSION,
+        'snapshot': snapshot,
+        'generation': generation,
+        'journal_id': journal_id,
+        'count': int(labels.shape[0]),
+        'dim': int(gallery.dim),
+        'checksum': _checksum(arrays.values(), users_bytes)
+    }
+    temp_header = os.path.join(path, f".{HEADER_NAME}.{os.getpid()}.tmp")
+    with open(temp_header, 'w') as f:
+        json.dump(header, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_header, os.path.join(path, HEADER_NAME))
+
+    _remove_old_snapshots(path, snapshot)
+    return header
+
+
+def _remove_old_snapshots(path, current):
+    for name in os.listdir(path):
+        full_path = os.path.join(path, name)
+        if name != current and name != HEADER_NAME and os.path.isdir(full_path):
+            shutil.rmtree(full_path, ignore_errors=True)
+
+
+def load_snapshot(path, verify=False):
+    """
+    Map the current snapshot read-only
+    Args:
+        verify: recompute the checksum (reads every page, so startup cost
+                grows with the gallery again)
+    Returns: (FaceGallery backed by the mapped files, header), or (None, None)
+    """
+    for attempt in range(3):
+        header = read_header(path)
+        if header is None:
+            return None, None
+
+        snapshot_dir = os.path.join(path, header['snapshot'])
+        try:
+            arrays = {
+                name: np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode='r')
+                for name in ARRAYS
+            }
+            with open(os.path.join(snapshot_dir, 'users.json'), 'rb') as f:
+                users_bytes = f.read()
+            break
+        except FileNotFoundError:
+            # Replaced by a newer snapshot between reading CURRENT and opening it
+            if attempt == 2:
+                raise
+
+    encodings = arrays['encodings']
+    if encodings.shape != (header['count'], header['dim']) or arrays['labels'].shape[0] != header['count']:
+        raise ValueError(f"Gallery snapshot {header['snapshot']} does not match its header")
+    if verify and _checksum(arrays.values(), users_bytes) != header['checksum']:
+        raise ValueError(f"Gallery snapshot {header['snapshot']} failed checksum verification")
+
+    names = json.loads(users_bytes.decode('utf-8'))
+    users = {
+        int(user_id): {'full_name': full_name, 'employee_id': employee_id}
+        for user_id, full_name, employee_id in zip(arrays['user_ids'], names['full_name'], names['employee_id'])
+    }
+
+    gallery = FaceGallery.from_arrays(encodings, arrays['sq_norms'], arrays['labels'], users, removed=0)
+    gallery.backing = snapshot_dir
+    return gallery, header
@@ -0,0 +1,131 @@
+"""
+Motion Gate
+Cheap check in front of face detection: frames are downscaled to a small
+grayscale image of the region of interest and compared with the recent past
+(frame differencing against a running average, or OpenCV's MOG2 background
+subtractor). Detection only runs while something in the region changes, so
+an empty lobby costs almost no CPU.
+"""
+
+import cv2
+from config.camera_config import CameraConfig
+
+
+def parse_roi(value):
+    """
+    Parse "x,y,w,h" (fractions of the frame, 0-1) into a tuple
+    Returns: None for an empty value (whole frame)
+    """
+    if not value:
+        return None
+    x, y, w, h = (float(part) for part in value.split(','))
+    if not (0 <= x < 1 and 0 <= y < 1 and 0 < w <= 1 - x + 1e-9 and 0 < h <= 1 - y + 1e-9):
+        raise ValueError(f"Invalid motion ROI {value!r}: expected x,y,w,h fractions of the frame")
+    return x, y, w, h
+
+
+class MotionGate:
+    """
+    Decide per frame whether detection should run
+    Args:
+        method: 'diff' (running-average frame differencing) or 'mog2'
+        roi: (x, y, w, h) fractions of the frame to watch, or None for all of it
+        threshold: per-pixel intensity change counted as motion ('diff' only)
+        min_area: fraction of the region that must change to open the gate
+        hold_frames: frames the gate stays open after the last motion, so a
+            person who stops moving is still tracked and identified
+        width: width in pixels of the downscaled image that is compared
+    """
+
+    def __init__(self, method='diff', roi=None, threshold=25, min_area=0.01, hold_frames=10, width=160):
+        if method not in ('diff', 'mog2'):
+            raise ValueError(f"Unknown motion gate method: {method}")
+        self.method = method
+        self.roi = roi
+        self.threshold = threshold
+        self.min_area = min_area
+        self.hold_frames = hold_frames
+        self.width = width
+        self._background = None
+        self._subtractor = None
+        self._hold = 0
+
+        # Counters
+        self.frames_passed = 0
+        self.frames_gated = 0
+        self.last_motion = 0.0  # Changed fraction of the region in the last frame
+
+    def _prepare(self, frame):
+        """Crop to the ROI, downscale and convert to blurred grayscale"""
+        if self.roi:
+            height, width = frame.shape[:2]
+            x, y, w, h = self.roi
+            frame = frame[int(y * height):int((y + h) * height), int(x * width):int((x + w) * width)]
+
+        scale = self.width / frame.shape[1]
+        small = cv2.resize(frame, (self.width, max(1, int(frame.shape[0] * scale))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def _motion_fraction(self, gray):
+        if self.method == 'mog2':
+            if self._subtractor is None:
+                self._subtractor = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16,
+                                                                      detectShadows=False)
+            mask = self._subtractor.apply(gray)
+            return cv2.countNonZero(mask) / mask.size
+
+        if self._background is None:
+            self._background = gray.astype('float32')
+            return 1.0  # Nothing to compare with yet; let the first frame through
+
+        delta = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(gray, self._background, 0.1)
+        _, mask = cv2.threshold(delta, self.threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) / mask.size
+
+    def check(self, frame):
+        """True if detection should run on this frame"""
+        self.last_motion = self._motion_fraction(self._prepare(frame))
+        if self.last_motion >= self.min_area:
+            self._hold = self.hold_frames
+            passed = True
+        elif self._hold > 0:
+            self._hold -= 1
+            passed = True
+        else:
+            passed = False
+
+        if passed:
+            self.frames_passed += 1
+        else:
+            self.frames_gated += 1
+        return passed
+
+    def get_stats(self):
+        total = self.frames_passed + self.frames_gated
+        return {
+            'method': self.method,
+            'frames_passed': self.frames_passed,
+            'frames_gated': self.frames_gated,
+            'gated_ratio': round(self.frames_gated / total, 3) if total else 0.0,
+            'last_motion': round(self.last_motion, 4)
+        }
+
+
+def create_motion_gate(method=None):
+    """
+    Create the motion gate selected by CameraConfig.MOTION_GATE
+    Returns: None when gating is turned off ('off')
+    """
+    method = method or CameraConfig.MOTION_GATE
+    if method == 'off':
+        return None
+    return MotionGate(
+        method=method,
+        roi=parse_roi(CameraConfig.MOTION_ROI),
+        threshold=CameraConfig.MOTION_THRESHOLD,
+        min_area=CameraConfig.MOTION_MIN_AREA,
+        hold_frames=CameraConfig.MOTION_HOLD_FRAMES
+    )
@@ -0,0 +1,220 @@
+"""
+Pipeline building blocks for the entrance monitor
+Bounded hand-off queues that drop the oldest item instead of blocking the
+producer, a single-slot "latest value" buffer for camera frames, and
+per-stage latency counters.
+"""
+
+import collections
+import threading
+import time
+
+
+class DropOldestQueue:
+    """
+    Bounded FIFO whose put() never blocks: when full, the oldest item is
+    discarded so consumers always work on the freshest data
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = collections.deque()
+        self._condition = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        """Add an item; returns the item dropped to make room, or None"""
+        with self._condition:
+            dropped = None
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._condition.notify()
+            return dropped
+
+    def get(self, timeout=None):
+        """Oldest item, or None if nothing arrived within `timeout` seconds"""
+        with self._condition:
+            if not self._items:
+                self._condition.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def drain(self):
+        """Remove and return every queued item"""
+        with self._condition:
+            items = list(self._items)
+            self._items.clear()
+            return items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get_stats(self):
+        return {'depth': len(self._items), 'maxsize': self.maxsize,
+                'put': self.put_count, 'dropped': self.dropped}
+
+
+class LatestValue:
+    """
+    Single-slot buffer: the producer overwrites, consumers take the newest
+    value once. Overwritten values that were never taken count as dropped.
+    """
+
+    def __init__(self, condition=None):
+        self._value = None
+        self._fresh = False
+        # Several slots may share one condition so a consumer can wait on all of them
+        self._condition = condition or threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, value):
+        with self._condition:
+            if self._fresh:
+                self.dropped += 1
+            self._value = value
+            self._fresh = True
+            self.put_count += 1
+            self._condition.notify_all()
+
+    def take(self, timeout=None):
+        """Newest value not taken yet, or None on timeout"""
+        with self._condition:
+            if not self._fresh:
+                self._condition.wait(timeout)
+            if not self._fresh:
+                return None
+            self._fresh = False
+            self._condition.notify_all()
+            return self._value
+
+    def poll(self):
+        """Newest value not taken yet, or None without waiting"""
+        with self._condition:
+            if not self._fresh:
+                return None
+            self._fresh = False
+            self._condition.notify_all()
+            return self._value
+
+    def wait_taken(self, timeout=None):
+        """Block until the pending value has been taken; returns False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._fresh, timeout)
+
+    def peek(self):
+        """Newest value, whether or not it was taken"""
+        return self._value
+
+    def get_stats(self):
+        return {'depth': int(self._fresh), 'maxsize': 1,
+                'put': self.put_count, 'dropped': self.dropped}
+
+
+class RoundRobinScheduler:
+    """
+    Hands out values from several LatestValue slots (one per camera) in
+    round-robin order, so a busy camera cannot starve the others: each slot
+    holds at most one pending frame and every slot is served once per cycle
+    """
+
+    def __init__(self, count):
+        self._condition = threading.Condition()
+        self.slots = [LatestValue(self._condition) for _ in range(count)]
+        self._next = 0
+        self.served = [0] * count
+
+    def take(self, timeout=None):
+        """
+        Next pending value in round-robin order
+        Returns: (slot index, value), or (None, None) on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                for offset in range(len(self.slots)):
+                    index = (self._next + offset) % len(self.slots)
+                    value = self.slots[index].poll()
+                    if value is not None:
+                        self._next = index + 1
+                        self.served[index] += 1
+                        return index, value
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None, None
+                self._condition.wait(remaining)
+
+
+class StageStats:
+    """
+    Thread-safe latency counters (milliseconds) for named pipeline stages
+    The most recent `samples` values per stage are kept for percentiles
+    """
+
+    def __init__(self, samples=10000):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self.samples = samples
+
+    def record(self, stage, elapsed_ms):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = {
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0,
+                    'samples': collections.deque(maxlen=self.samples)
+                }
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['last_ms'] = elapsed_ms
+            stats['samples'].append(elapsed_ms)
+
+    def time(self, stage, start):
+        """Record the time since a time.perf_counter() start value"""
+        self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def percentiles(self, stage, percents=(50, 95, 99)):
+        """Latency percentiles of a stage over the kept samples ({} if never recorded)"""
+        with self._lock:
+            stats = self._stages.get(stage)
+            samples = sorted(stats['samples']) if stats else []
+        if not samples:
+            return {}
+        return {
+            f"p{percent}": round(samples[min(len(samples) - 1, int(len(samples) * percent / 100))], 2)
+            for percent in percents
+        }
+
+    def merge(self, other):
+        """Fold another StageStats into this one (e.g. per-camera into a total)"""
+        with other._lock:
+            stages = {
+                stage: (stats['count'], stats['total_ms'], stats['max_ms'], stats['last_ms'], list(stats['samples']))
+                for stage, stats in other._stages.items()
+            }
+        for stage, (count, total_ms, max_ms, last_ms, samples) in stages.items():
+            for sample in samples:
+                self.record(stage, sample)
+            # Counts and totals cover more than the kept samples
+            with self._lock:
+                stats = self._stages[stage]
+                stats['count'] += count - len(samples)
+                stats['total_ms'] += total_ms - sum(samples)
+                stats['max_ms'] = max(stats['max_ms'], max_ms)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                stage: {
+                    'count': stats['count'],
+                    'avg_ms': round(stats['total_ms'] / stats['count'], 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                    'last_ms': round(stats['last_ms'], 2)
+                }
+                for stage, stats in self._stages.items()
+            }
@@ -0,0 +1,209 @@
+"""
+Write-behind recognition log
+Recognition attempts are buffered in memory and written by a background
+thread in batches (one multi-row INSERT per batch) every few hundred
+milliseconds or as soon as enough entries are waiting, so audit logging is
+off the request path. The buffer is bounded and an overflow policy decides
+what happens when it is full. Pending entries are flushed on shutdown.
+"""
+
+import atexit
+import collections
+import os
+import threading
+import time
+from datetime import datetime
+from config.recognition_config import RecognitionConfig
+from models import RecognitionLog
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'sync')
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class RecognitionLogWriter:
+    """
+    Args:
+        max_buffer: entries held in memory before the overflow policy applies
+        flush_interval: seconds between flushes
+        flush_rows: buffered entries that trigger an early flush (and batch size)
+        overflow: 'drop_oldest' or 'drop_newest' discard an entry when the
+            buffer is full; 'sync' writes the buffer in the caller's thread
+    """
+
+    def __init__(self, max_buffer=10000, flush_interval=0.5, flush_rows=500, overflow='drop_oldest'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown recognition log overflow policy: {overflow}")
+        self.max_buffer = max(max_buffer, 1)
+        self.flush_interval = flush_interval
+        self.flush_rows = max(flush_rows, 1)
+        self.overflow = overflow
+        self._buffer = collections.deque()
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._stats = {'logged': 0, 'flushed': 0, 'dropped': 0, 'failed': 0, 'batches': 0, 'sync_writes': 0}
+
+    def _ensure_started(self):
+        """Start the flusher thread (again after a fork: threads do not survive it)"""
+        if self._pid == os.getpid():
+            return
+        if self._pid is not None:
+            # Forked child: locks may have been held by parent threads
+            self._condition = threading.Condition()
+            self._write_lock = threading.Lock()
+        with self._condition:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Entries inherited from the parent are the parent's to write
+                self._buffer.clear()
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='recognition-log-writer', daemon=True)
+            self._thread.start()
+
+    def log(self, user_id=None, confidence=0, status='success', photo_path=None):
+        """Queue one recognition attempt, timestamped now"""
+        self.log_many([{
+            'user_id': user_id,
+            'confidence': confidence,
+            'status': status,
+            'photo_path': photo_path
+        }])
+
+    def log_many(self, entries):
+        """Queue recognition attempts (dicts as taken by RecognitionLog.log_recognitions)"""
+        now = datetime.now()
+        entries = [dict(entry, timestamp=entry.get('timestamp') or now) for entry in entries]
+        if not entries:
+            return
+
+        self._ensure_started()
+        overflow = []
+        with self._condition:
+            self._stats['logged'] += len(entries)
+            if self._stopping:
+                # Shut down already: write in the caller's thread
+                overflow = entries
+                entries = []
+
+            for entry in entries:
+                if len(self._buffer) >= self.max_buffer:
+                    if self.overflow == 'drop_newest':
+                        self._stats['dropped'] += 1
+                        continue
+                    if self.overflow == 'drop_oldest':
+                        self._buffer.popleft()
+                        self._stats['dropped'] += 1
+                    else:
+                        overflow.extend(self._buffer)
+                        self._buffer.clear()
+                self._buffer.append(entry)
+
+            if len(self._buffer) >= self.flush_rows:
+                self._condition.notify()
+
+        if overflow:
+            with self._condition:
+                self._stats['sync_writes'] += 1
+            self._write(overflow)
+
+    def _take(self):
+        """Remove and return everything buffered"""
+        with self._condition:
+            batch = list(self._buffer)
+            self._buffer.clear()
+            return batch
+
+    def _write(self, entries, requeue=False):
+        """
+        Write entries in batches of flush_rows; failed batches are requeued or counted
+        Returns: False if a batch failed
+        """
+        with self._write_lock:
+            for start in range(0, len(entries), self.flush_rows):
+                batch = entries[start:start + self.flush_rows]
+                try:
+                    RecognitionLog.log_recognitions(batch)
+                except Exception as e:
+                    print(f"Error writing {len(batch)} recognition log entries: {str(e)}")
+                    remaining = entries[start:]
+                    if requeue:
+                        self._requeue(remaining)
+                    else:
+                        with self._condition:
+                            self._stats['failed'] += len(remaining)
+                    return False
+                with self._condition:
+                    self._stats['flushed'] += len(batch)
+                    self._stats['batches'] += 1
+        return True
+
+    def _requeue(self, entries):
+        """Put unwritten entries back in front of the buffer, dropping what no longer fits"""
+        with self._condition:
+            room = max(self.max_buffer - len(self._buffer), 0)
+            kept = entries[:room]
+            self._stats['dropped'] += len(entries) - len(kept)
+            self._buffer.extendleft(reversed(kept))
+
+    def _run(self):
+        while True:
+            deadline = time.monotonic() + self.flush_interval
+            with self._condition:
+                while not self._stopping and len(self._buffer) < self.flush_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                stopping = self._stopping
+
+            batch = self._take()
+            # Retried on the next pass while running; counted as failed on shutdown
+            written = self._write(batch, requeue=not stopping) if batch else True
+            if stopping:
+                return
+            if not written:
+                # Database unavailable: back off for one interval before retrying
+                time.sleep(self.flush_interval)
+
+    def flush(self):
+        """Write everything buffered now, in the caller's thread"""
+        self._write(self._take())
+
+    def shutdown(self, timeout=5.0):
+        """Stop the flusher thread and write the remaining entries"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush()
+
+    def get_stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats['buffered'] = len(self._buffer)
+        stats['max_buffer'] = self.max_buffer
+        stats['overflow'] = self.overflow
+        return stats
+
+
+def get_log_writer():
+    """Get the shared recognition log writer, flushed at interpreter exit"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = RecognitionLogWriter(
+                max_buffer=RecognitionConfig.RECOGNITION_LOG_BUFFER,
+                flush_interval=RecognitionConfig.RECOGNITION_LOG_FLUSH_MS / 1000,
+                flush_rows=RecognitionConfig.RECOGNITION_LOG_FLUSH_ROWS,
+                overflow=RecognitionConfig.RECOGNITION_LOG_OVERFLOW
+            )
+            atexit.register(_writer.shutdown)
+        return _writer
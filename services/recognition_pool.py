@@ -0,0 +1,228 @@
+"""
+Process pool for CPU-bound recognition work
+Image decoding, face detection and dlib encoding run in a fixed set of worker
+processes, each with its own warmed detector and dlib models, so concurrent
+requests are not serialized on one interpreter. Matching against the gallery
+stays in the calling process, where it is one vectorized search.
+"""
+
+import threading
+import cv2
+import numpy as np
+import face_recognition
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from config.recognition_config import RecognitionConfig
+from services.face_detector import create_face_detector, detect_faces
+from utils.stage_timer import StageTimer
+
+# Per-worker detector, created once by the pool initializer
+_detector = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class RecognitionPoolBusy(Exception):
+    """Raised when the task queue stays full for longer than the task timeout"""
+
+
+def _init_worker():
+    """Load the face detector and page in the dlib models once per worker process"""
+    global _detector
+    _detector = create_face_detector()
+
+    blank = np.zeros((160, 160, 3), dtype=np.uint8)
+    _detector.detect(blank)
+    face_recognition.face_encodings(blank, [(0, 160, 160, 0)])
+
+
+def _ping():
+    """No-op task used to start every worker process up front"""
+    return True
+
+
+def encode_image_bytes(image_bytes):
+    """
+    Decode an encoded image, detect faces and encode the first one
+    Runs inside a pool worker
+    Returns: {encoding: float32 (128,) array or None, location, message, timings}
+    """
+    timer = StageTimer()
+    result = {'encoding': None, 'location': None, 'message': None}
+
+    try:
+        with timer.stage('decode'):
+            image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+            if image is not None:
+                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        if image is None:
+            result['message'] = 'Could not decode image'
+            return result
+
+        with timer.stage('detect'):
+            face_locations = detect_faces(_detector, rgb_image, RecognitionConfig.DETECTION_MAX_SIDE)
+
+        if len(face_locations) == 0:
+            result['message'] = 'No face detected in image'
+            return result
+
+        with timer.stage('encode'):
+            face_encodings = face_recognition.face_encodings(rgb_image, face_locations[:1])
+
+        if len(face_encodings) == 0:
+            result['message'] = 'Could not generate encoding for detected face'
+            return result
+
+        result['encoding'] = np.asarray(face_encodings[0], dtype=np.float32)
+        result['location'] = tuple(int(v) for v in face_locations[0])
+        return result
+
+    except Exception as e:
+        result['message'] = f'Error during face recognition: {str(e)}'
+        return result
+
+    finally:
+        result['timings'] = timer.as_dict()
+
+
+def detect_image(rgb_image):
+    """
+    Detect faces in an RGB image with the worker's detector
+    Runs inside a pool worker
+    Returns: list of (top, right, bottom, left) boxes
+    """
+    return [tuple(int(v) for v in location) for location in _detector.detect(rgb_image)]
+
+
+def encode_faces(rgb_image, face_locations):
+    """
+    Encode the given face boxes of an RGB image in one call
+    Runs inside a pool worker
+    Returns: list of float32 (128,) encodings in face_locations order
+    """
+    encodings = face_recognition.face_encodings(rgb_image, face_locations)
+    return [np.asarray(encoding, dtype=np.float32) for encoding in encodings]
+
+
+class RecognitionPool:
+    """
+    Fixed-size recognition worker pool fed through a bounded queue
+    At most `workers + max_queue` tasks are accepted at once; submitters wait up
+    to `task_timeout` seconds for a free slot and then for the result.
+    A timed-out task is cancelled if it has not started yet; one that is already
+    running finishes in its worker and its result is discarded.
+    With workers=0 tasks run inline in the calling thread (development mode).
+    """
+
+    def __init__(self, workers, max_queue=32, task_timeout=10.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.task_timeout = task_timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_queue)
+        self._stats_lock = threading.Lock()
+        self._stats = {'submitted': 0, 'completed': 0, 'rejected': 0, 'timed_out': 0}
+
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        else:
+            self._executor = None
+            _init_worker()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def warm_up(self):
+        """Start every worker process now instead of on the first requests"""
+        if self._executor is not None:
+            futures = [self._executor.submit(_ping) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+
+    def _task_done(self, future):
+        self._slots.release()
+        self._count('completed')
+
+    def submit(self, fn, *args):
+        """Queue a task, waiting up to task_timeout for a free queue slot"""
+        if self._executor is None:
+            raise RuntimeError('Inline pool does not support submit(), use run()')
+
+        if not self._slots.acquire(timeout=self.task_timeout):
+            self._count('rejected')
+            raise RecognitionPoolBusy('Recognition queue is full')
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._count('submitted')
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=self.task_timeout)
+        except TimeoutError:
+            future.cancel()
+            self._count('timed_out')
+            raise
+
+    def run(self, fn, *args):
+        """Run a task on the pool and wait for its result"""
+        if self._executor is None:
+            self._count('submitted')
+            try:
+                return fn(*args)
+            finally:
+                self._count('completed')
+        return self._wait(self.submit(fn, *args))
+
+    def encode_image(self, image_bytes):
+        """Decode, detect and encode one encoded image on the pool"""
+        return self.run(encode_image_bytes, image_bytes)
+
+    def encode_images(self, images):
+        """
+        Decode, detect and encode a list of encoded images across the pool
+        Returns: list of encode_image_bytes results in input order
+        """
+        if self._executor is None:
+            return [self.run(encode_image_bytes, image) for image in images]
+        futures = [self.submit(encode_image_bytes, image) for image in images]
+        return [self._wait(future) for future in futures]
+
+    def get_stats(self):
+        """Get pool counters: submitted, completed, rejected, timed_out, in_flight"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['in_flight'] = stats['submitted'] - stats['completed']
+        stats['workers'] = self.workers
+        stats['max_queue'] = self.max_queue
+        return stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def get_recognition_pool():
+    """Get the shared recognition pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RecognitionPool(
+                workers=RecognitionConfig.RECOGNITION_WORKERS,
+                max_queue=RecognitionConfig.RECOGNITION_QUEUE_SIZE,
+                task_timeout=RecognitionConfig.RECOGNITION_TASK_TIMEOUT
+            )
+            _pool.warm_up()
+        return _pool
+
+
+def encode_images(images):
+    """Decode, detect and encode a list of encoded images on the shared pool"""
+    return get_recognition_pool().encode_images(images)
@@ -0,0 +1,104 @@
+"""
+Replay Source
+Plays a video file or a directory of images through the same interface as
+cv2.VideoCapture (isOpened/grab/retrieve/read/set/get/release), so the
+entrance monitor can be profiled on a server or in CI without a camera.
+Frames are delivered at the recording's native frame rate, or as fast as
+they are consumed.
+"""
+
+import os
+import time
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class ReplaySource:
+    """
+    Args:
+        path: video file or directory of images (played in name order)
+        realtime: throttle to the native frame rate instead of running flat out
+        fps: frame rate of an image directory (video files use their own)
+    """
+
+    def __init__(self, path, realtime=True, fps=10.0):
+        self.path = path
+        self.realtime = realtime
+        self._capture = None
+        self._images = None
+        self._position = 0
+
+        if os.path.isdir(path):
+            self._images = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            self.fps = fps
+        else:
+            self._capture = cv2.VideoCapture(path)
+            self.fps = self._capture.get(cv2.CAP_PROP_FPS) or fps
+
+        self._started = None
+
+    def isOpened(self):
+        if self._images is not None:
+            return len(self._images) > 0
+        return self._capture.isOpened()
+
+    def _throttle(self):
+        """Sleep until the current frame is due at the native frame rate"""
+        if self._started is None:
+            self._started = time.monotonic()
+            return
+        due = self._started + self._position / self.fps
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def grab(self):
+        """Advance to the next frame without decoding it; False at the end of the recording"""
+        if self.realtime:
+            self._throttle()
+
+        if self._images is not None:
+            if self._position >= len(self._images):
+                return False
+            self._position += 1
+            return True
+
+        grabbed = self._capture.grab()
+        if grabbed:
+            self._position += 1
+        return grabbed
+
+    def retrieve(self):
+        """Decode the frame selected by the last grab() as (ret, frame)"""
+        if self._images is not None:
+            path = self._images[self._position - 1]
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"Skipping unreadable image {path}")
+            return frame is not None, frame
+        return self._capture.retrieve()
+
+    def read(self):
+        """Next frame as (ret, frame); ret is False at the end of the recording"""
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def set(self, prop, value):
+        # Resolution and buffering are properties of the recording
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT and self._images is not None:
+            return len(self._images)
+        return self._capture.get(prop) if self._capture is not None else 0
+
+    def release(self):
+        if self._capture is not None:
+            self._capture.release()
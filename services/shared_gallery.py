@@ -0,0 +1,173 @@
+"""
+Shared-memory gallery backend
+One process publishes the gallery into a named multiprocessing.shared_memory
+segment; every server worker maps the same pages read-only, so memory stays
+flat as workers are added and a new worker attaches without unpickling.
+
+Segment layout (little-endian):
+    header    64 bytes   magic, version, dim, count, generation, users_len,
+                         nlist, offsets_len
+    matrix    count * dim float32
+    sq_norms  count float32
+    labels    count int32 (user_id per row)
+    centroids nlist * dim float32
+    offsets   offsets_len int64
+    users     users_len bytes of JSON {user_id: [full_name, employee_id]}
+
+With an IVF or centroid index the publisher stores the rows cluster by
+cluster and adds the centroids and cluster offsets, so attaching workers
+search the shared rows directly instead of each clustering the gallery and
+keeping a private reordered copy. Both blocks are empty otherwise.
+"""
+
+import fcntl
+import json
+import struct
+import numpy as np
+from contextlib import contextmanager
+from multiprocessing import shared_memory, resource_tracker
+
+try:
+    from _posixshmem import shm_unlink
+except ImportError:
+    shm_unlink = None
+from services.face_gallery import FaceGallery
+
+MAGIC = b'EYEGAL01'
+VERSION = 2
+HEADER = struct.Struct('<8sIIQQQQQ')
+HEADER_SIZE = 64
+
+
+def _open_segment(name, create=False, size=0):
+    """
+    Open a segment without handing it to the resource tracker, which would
+    otherwise unlink it when this process exits while other workers still use it
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument
+        segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+        resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+def _layout(count, dim, nlist=0, offsets_len=0):
+    """Byte offsets of the matrix, norms, labels, centroids, cluster offsets and users blocks"""
+    matrix_offset = HEADER_SIZE
+    norms_offset = matrix_offset + count * dim * 4
+    labels_offset = norms_offset + count * 4
+    centroids_offset = labels_offset + count * 4
+    offsets_offset = centroids_offset + nlist * dim * 4
+    users_offset = offsets_offset + offsets_len * 8
+    return matrix_offset, norms_offset, labels_offset, centroids_offset, offsets_offset, users_offset
+
+
+@contextmanager
+def gallery_lock(lock_path):
+    """
+    Exclusive cross-process lock so only one worker loads and publishes the
+    gallery while the others wait and then attach to the published copy
+    """
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def unlink_gallery(name):
+    """Remove a published gallery segment (workers already attached keep their mapping)"""
+    try:
+        segment = _open_segment(name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    if shm_unlink is not None:
+        # SharedMemory.unlink() would unregister the segment from the resource
+        # tracker a second time (it was never registered, see _open_segment)
+        shm_unlink(segment._name)
+    else:
+        segment.unlink()
+    return True
+
+
+def publish_gallery(gallery, name, generation=0, layout=None):
+    """
+    Publish a gallery into the named segment, replacing any previous one
+    The header is written last so readers never accept a half-written segment
+    Args:
+        layout: (centroids, offsets) of an index whose clusters are the
+            gallery's rows in order (see FaceIndex.layout()), or None
+    """
+    count, dim = len(gallery), gallery.dim
+    users = json.dumps({
+        str(user_id): [info['full_name'], info['employee_id']]
+        for user_id, info in gallery.users.items()
+    }).encode('utf-8')
+    centroids, offsets = layout if layout is not None else (np.empty((0, dim)), np.empty(0))
+    nlist, offsets_len = len(centroids), len(offsets)
+
+    (matrix_offset, norms_offset, labels_offset,
+     centroids_offset, offsets_offset, users_offset) = _layout(count, dim, nlist, offsets_len)
+    size = users_offset + len(users)
+
+    unlink_gallery(name)
+    segment = _open_segment(name, create=True, size=size)
+    try:
+        buffer = segment.buf
+        np.ndarray((count, dim), np.float32, buffer, matrix_offset)[:] = gallery.encodings
+        np.ndarray((count,), np.float32, buffer, norms_offset)[:] = gallery.sq_norms
+        np.ndarray((count,), np.int32, buffer, labels_offset)[:] = gallery.labels
+        np.ndarray((nlist, dim), np.float32, buffer, centroids_offset)[:] = centroids
+        np.ndarray((offsets_len,), np.int64, buffer, offsets_offset)[:] = offsets
+        buffer[users_offset:users_offset + len(users)] = users
+        buffer[:HEADER.size] = HEADER.pack(MAGIC, VERSION, dim, count, generation, len(users),
+                                           nlist, offsets_len)
+    finally:
+        segment.close()
+
+    return size
+
+
+def attach_gallery(name):
+    """
+    Map a published gallery read-only
+    Returns: (FaceGallery backed by the shared segment, generation, layout), or
+    (None, None, None) when no complete gallery is published under that name;
+    layout is (centroids, offsets) as given to publish_gallery, or None
+    """
+    try:
+        segment = _open_segment(name)
+    except FileNotFoundError:
+        return None, None, None
+
+    magic, version, dim, count, generation, users_len, nlist, offsets_len = HEADER.unpack_from(segment.buf, 0)
+    if magic != MAGIC or version != VERSION:
+        segment.close()
+        return None, None, None
+
+    (matrix_offset, norms_offset, labels_offset,
+     centroids_offset, offsets_offset, users_offset) = _layout(count, dim, nlist, offsets_len)
+    buffer = segment.buf
+    encodings = np.ndarray((count, dim), np.float32, buffer, matrix_offset)
+    sq_norms = np.ndarray((count,), np.float32, buffer, norms_offset)
+    labels = np.ndarray((count,), np.int32, buffer, labels_offset)
+    centroids = np.ndarray((nlist, dim), np.float32, buffer, centroids_offset)
+    offsets = np.ndarray((offsets_len,), np.int64, buffer, offsets_offset)
+    for array in (encodings, sq_norms, labels, centroids, offsets):
+        array.flags.writeable = False
+    layout = (centroids, offsets) if nlist else None
+
+    users = json.loads(bytes(buffer[users_offset:users_offset + users_len]).decode('utf-8'))
+    users = {
+        int(user_id): {'full_name': full_name, 'employee_id': employee_id}
+        for user_id, (full_name, employee_id) in users.items()
+    }
+
+    gallery = FaceGallery.from_arrays(encodings, sq_norms, labels, users)
+    # Keep the mapping alive for as long as the gallery is referenced
+    gallery.backing = segment
+    return gallery, generation, layout
@@ -0,0 +1,109 @@
+"""
+Binary storage format for face encodings
+Each facial_encodings.encoding value is a fixed-width record:
+    magic    4 bytes   b'FENC'
+    version  uint16    little-endian
+    dim      uint16    little-endian
+    values   dim float32, little-endian
+A 128-d encoding takes 520 bytes, against ~1.2 KB for a pickled float64 array.
+Because every row has the same width, a binary COPY of (user_id, encoding)
+is itself a run of fixed-width tuples and is decoded with a single
+np.frombuffer instead of unpickling row by row.
+"""
+
+import pickle
+import struct
+import numpy as np
+
+MAGIC = b'FENC'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+
+# PostgreSQL binary COPY framing
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+COPY_TRAILER = b'\xff\xff'
+
+
+def encoding_size(dim=128):
+    """Size in bytes of one encoded vector"""
+    return HEADER.size + dim * 4
+
+
+def is_binary_encoding(data):
+    """True if the value is in the binary format (False for legacy pickles)"""
+    return bytes(data[:4]) == MAGIC
+
+
+def encode_encoding(encoding):
+    """Serialize one encoding vector as header + little-endian float32 bytes"""
+    values = np.asarray(encoding, dtype='<f4').reshape(-1)
+    return HEADER.pack(MAGIC, VERSION, values.shape[0]) + values.tobytes()
+
+
+def decode_encoding(data):
+    """
+    Deserialize one encoding (binary format, or a legacy pickled numpy array)
+    Returns: float32 vector
+    """
+    data = bytes(data)
+    if not is_binary_encoding(data):
+        return np.asarray(pickle.loads(data), dtype=np.float32)
+
+    magic, version, dim = HEADER.unpack_from(data)
+    if version != VERSION or len(data) != encoding_size(dim):
+        raise ValueError(f"Unsupported encoding record (version {version}, {len(data)} bytes)")
+    return np.frombuffer(data, dtype='<f4', count=dim, offset=HEADER.size).astype(np.float32)
+
+
+def _copy_row_dtype(dim):
+    """One binary COPY tuple of (user_id int4, encoding bytea)"""
+    return np.dtype([
+        ('fields', '>i2'),
+        ('user_id_len', '>i4'),
+        ('user_id', '>i4'),
+        ('encoding_len', '>i4'),
+        ('magic', 'S4'),
+        ('version', '<u2'),
+        ('dim', '<u2'),
+        ('values', '<f4', (dim,)),
+    ])
+
+
+def decode_copy_rows(buffer, dim=128):
+    """
+    Decode the output of
+        COPY (SELECT user_id, encoding ...) TO STDOUT WITH (FORMAT binary)
+    with one np.frombuffer over the fixed-width tuples
+    Returns: (user_ids int32 array, (n, dim) float32 matrix), or None if any
+    row is not in the binary format (e.g. legacy pickles not yet migrated)
+    """
+    buffer = memoryview(buffer)
+    if bytes(buffer[:len(COPY_SIGNATURE)]) != COPY_SIGNATURE:
+        raise ValueError("Not a binary COPY stream")
+
+    # Signature, flags, then a header extension of the given length
+    extension_len = struct.unpack_from('>i', buffer, len(COPY_SIGNATURE) + 4)[0]
+    start = len(COPY_SIGNATURE) + 8 + extension_len
+    if bytes(buffer[-2:]) != COPY_TRAILER:
+        raise ValueError("Truncated binary COPY stream")
+    body = buffer[start:-2]
+
+    row_dtype = _copy_row_dtype(dim)
+    if len(body) % row_dtype.itemsize:
+        return None
+
+    rows = np.frombuffer(body, dtype=row_dtype)
+    valid = (
+        (rows['fields'] == 2)
+        & (rows['user_id_len'] == 4)
+        & (rows['encoding_len'] == encoding_size(dim))
+        & (rows['magic'] == MAGIC)
+        & (rows['version'] == VERSION)
+        & (rows['dim'] == dim)
+    )
+    if not valid.all():
+        return None
+
+    user_ids = rows['user_id'].astype(np.int32)
+    encodings = np.ascontiguousarray(rows['values'], dtype=np.float32)
+    return user_ids, encodings
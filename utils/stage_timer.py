@@ -0,0 +1,32 @@
+"""
+Per-stage timing helper for the recognition pipeline
+"""
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Collects wall-clock durations (milliseconds) of named pipeline stages
+    Usage:
+        timer = StageTimer()
+        with timer.stage('detect'):
+            ...
+        timer.timings  # {'detect': 12.3}
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def as_dict(self):
+        """Timings rounded for JSON responses"""
+        return {name: round(ms, 2) for name, ms in self.timings.items()}